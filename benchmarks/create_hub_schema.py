@@ -0,0 +1,45 @@
+"""
+Benchmarks `create_hub_schema()` and `connect_hub()` on the test hubs, whose configs range from small ones to ones with
+many rounds and long task-id value lists (e.g., variant-nowcast-hub and FluSight-forecast-hub):
+
+    uv run python benchmarks/create_hub_schema.py
+    uv run python benchmarks/create_hub_schema.py test/hubs/variant-nowcast-hub --repeat 50
+"""
+import json
+import statistics
+import time
+from pathlib import Path
+
+import click
+
+from hubdata import connect_hub, create_hub_schema
+
+
+@click.command()
+@click.argument('hub_paths', nargs=-1, type=click.Path(exists=True, file_okay=False, path_type=Path))
+@click.option('--repeat', default=20, show_default=True, help='number of timed runs per case')
+def main(hub_paths, repeat):
+    hub_paths = hub_paths or sorted(path for path in Path('test/hubs').iterdir()
+                                    if (path / 'hub-config' / 'tasks.json').exists())
+    for hub_path in hub_paths:
+        with open(hub_path / 'hub-config' / 'tasks.json') as tasks_fp:
+            tasks = json.load(tasks_fp)
+        num_values = sum(len(task_id_value.get('required') or []) + len(task_id_value.get('optional') or [])
+                         for the_round in tasks['rounds'] for model_task in the_round['model_tasks']
+                         for task_id_value in model_task['task_ids'].values())
+        print(f'{hub_path.name}: {len(tasks["rounds"])} rounds, {num_values:,} task-id values')
+
+        cases = {'create_hub_schema': lambda: create_hub_schema(tasks),
+                 'connect_hub': lambda: connect_hub(hub_path)}
+        for case_name, case_fcn in cases.items():
+            durations = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                case_fcn()
+                durations.append(time.perf_counter() - start)
+            print(f'{case_name:>20}: median {statistics.median(durations) * 1000:.1f}ms, '
+                  f'best {min(durations) * 1000:.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
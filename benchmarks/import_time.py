@@ -0,0 +1,38 @@
+"""
+Measures the wall-clock startup time of `import hubdata`, `import hubdata.app`, and `hubdata --help`, each in a fresh
+Python process. `test/test_import_time.py` guards against heavy dependencies creeping back into these paths; use this
+script to see the actual timings:
+
+    uv run python benchmarks/import_time.py
+"""
+import statistics
+import subprocess
+import sys
+import time
+
+import click
+
+CASES = {
+    'import hubdata': [sys.executable, '-c', 'import hubdata'],
+    'import hubdata.app': [sys.executable, '-c', 'import hubdata.app'],
+    'hubdata --help': [sys.executable, '-m', 'hubdata.app', '--help'],
+    'from hubdata import connect_hub': [sys.executable, '-c', 'from hubdata import connect_hub'],
+    'python (baseline)': [sys.executable, '-c', 'pass'],
+}
+
+
+@click.command()
+@click.option('--repeat', default=10, show_default=True, help='number of timed runs per case')
+def main(repeat):
+    for case_name, args in CASES.items():
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(args, check=True, stdout=subprocess.DEVNULL)
+            durations.append(time.perf_counter() - start)
+        print(f'{case_name:>32}: median {statistics.median(durations) * 1000:.0f}ms, '
+              f'best {min(durations) * 1000:.0f}ms')
+
+
+if __name__ == '__main__':
+    main()
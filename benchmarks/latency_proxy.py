@@ -0,0 +1,49 @@
+"""
+A TCP proxy that adds a fixed latency to every chunk of data sent from clients to a server, which approximates the
+per-request time-to-first-byte of a remote object store when put in front of a local S3-compatible stand-in (e.g.,
+MinIO or `moto_server`). Used with `benchmarks/scan_profiles.py`:
+
+    moto_server -p 9000 &  # or MinIO
+    uv run python benchmarks/latency_proxy.py --listen-port 9001 --target-port 9000 --latency-ms 50 &
+    # ... pass `--endpoint 127.0.0.1:9001` to benchmarks/scan_profiles.py ...
+"""
+import asyncio
+
+import click
+
+
+async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, latency: float):
+    try:
+        while data := await reader.read(64 * 1024):
+            if latency:
+                await asyncio.sleep(latency)
+            writer.write(data)
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def _serve(listen_port: int, target_host: str, target_port: int, latency: float):
+    async def handle_client(client_reader, client_writer):
+        server_reader, server_writer = await asyncio.open_connection(target_host, target_port)
+        await asyncio.gather(_pipe(client_reader, server_writer, latency), _pipe(server_reader, client_writer, 0))
+
+
+    server = await asyncio.start_server(handle_client, '127.0.0.1', listen_port)
+    async with server:
+        await server.serve_forever()
+
+
+@click.command()
+@click.option('--listen-port', default=9001, show_default=True, help='port to listen on')
+@click.option('--target-host', default='127.0.0.1', show_default=True, help='host to forward to')
+@click.option('--target-port', default=9000, show_default=True, help='port to forward to')
+@click.option('--latency-ms', default=50, show_default=True, help='latency added to each client-to-server chunk')
+def main(listen_port, target_host, target_port, latency_ms):
+    asyncio.run(_serve(listen_port, target_host, target_port, latency_ms / 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmarks `HubConnection.to_table()` under each scan profile against the time it takes to simply download the hub's
+model output files. "scan" cases time only the scan of an already-discovered dataset, and "to_table" cases also include
+file discovery. Intended to be run against an S3-compatible stand-in like MinIO or `moto_server` that's been loaded
+with a hub's files, but it works with any hub URI. Example using a local MinIO server and the
+example-complex-forecast-hub:
+
+    docker run -p 9000:9000 -e MINIO_ROOT_USER=minio -e MINIO_ROOT_PASSWORD=minio123 minio/minio server /data
+    # ... create bucket `example-complex-forecast-hub` and copy the hub into it, e.g., via `mc mirror` ...
+    AWS_ACCESS_KEY_ID=minio AWS_SECRET_ACCESS_KEY=minio123 uv run python benchmarks/scan_profiles.py \
+        s3://example-complex-forecast-hub --endpoint 127.0.0.1:9000
+
+A local server has much lower latency than S3. To get representative numbers, run it behind a proxy that adds
+per-request latency (e.g., `benchmarks/latency_proxy.py`, or toxiproxy with a 50-100ms latency toxic) and pass the
+proxy's address as `--endpoint`.
+"""
+import functools
+import tempfile
+import time
+
+import click
+import pyarrow as pa
+from pyarrow import fs
+
+from hubdata import connect_hub
+from hubdata.scan_profiles import SCAN_PROFILES, scan_kwargs_for_profile
+
+
+@click.command()
+@click.argument('hub_path')
+@click.option('--endpoint', help='S3 endpoint override, e.g., 127.0.0.1:9000 for a local MinIO server')
+@click.option('--repeat', default=3, show_default=True, help='number of timed runs per case')
+def main(hub_path, endpoint, repeat):
+    filesystem_options = {'endpoint_override': endpoint, 'scheme': 'http'} if endpoint else None
+    hub_connection = connect_hub(hub_path, filesystem_options=filesystem_options)
+    hub_ds = hub_connection.get_dataset()
+    files = hub_ds.files if not isinstance(hub_ds, pa.dataset.UnionDataset) \
+        else [file for child in hub_ds.children for file in child.files]
+    print(f'{hub_path}: {len(files)} files, {hub_ds.count_rows():,} rows')
+
+
+    def download_files():
+        with tempfile.TemporaryDirectory() as temp_dir:
+            local_fs = fs.LocalFileSystem()
+            for idx, file in enumerate(files):
+                fs.copy_files(file, f'{temp_dir}/{idx}', source_filesystem=hub_connection._filesystem,
+                              destination_filesystem=local_fs)
+
+
+    cases = {'download': download_files}
+    for scan_profile in SCAN_PROFILES:
+        cases[f'scan ({scan_profile})'] = functools.partial(hub_ds.to_table, **scan_kwargs_for_profile(scan_profile))
+    for scan_profile in SCAN_PROFILES:
+        profile_connection = connect_hub(hub_path, filesystem_options=filesystem_options, scan_profile=scan_profile)
+        cases[f'to_table ({scan_profile})'] = profile_connection.to_table
+
+    for case_name, case_fcn in cases.items():
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            case_fcn()
+            durations.append(time.perf_counter() - start)
+        print(f'{case_name:>20}: best {min(durations):.3f}s, mean {sum(durations) / len(durations):.3f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,58 @@
-from hubdata.connect_hub import HubConnection, connect_hub
-from hubdata.create_hub_schema import create_hub_schema
+# NB: the public API is imported lazily (see `__getattr__()`) so that `import hubdata` and the CLI's startup don't pay
+# the cost of importing pyarrow and friends until they're actually used
+import sys
+import types
+from typing import TYPE_CHECKING
 
-__all__ = ['connect_hub', 'HubConnection', 'create_hub_schema']
+if TYPE_CHECKING:
+    from hubdata.connect_hub import HubConnection, connect_hub
+    from hubdata.create_hub_schema import create_hub_schema
+    from hubdata.quantiles import convert_samples, quantile_matrix
+    from hubdata.scoring import score_quantiles
+
+__all__ = ['connect_hub', 'HubConnection', 'create_hub_schema', 'convert_samples', 'quantile_matrix', 'score_quantiles']
 
 __version__ = '0.1.2'
+
+# maps each public name to the module that defines it
+_LAZY_IMPORTS = {
+    'connect_hub': 'hubdata.connect_hub',
+    'HubConnection': 'hubdata.connect_hub',
+    'create_hub_schema': 'hubdata.create_hub_schema',
+    'convert_samples': 'hubdata.quantiles',
+    'quantile_matrix': 'hubdata.quantiles',
+    'score_quantiles': 'hubdata.scoring',
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    import importlib
+
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    globals()[name] = value  # cache so that __getattr__ is only called once per name
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+class _HubdataModule(types.ModuleType):
+    """
+    Importing a submodule binds it as an attribute of this package, which would shadow the same-named function (e.g.,
+    `hubdata.connect_hub` the module vs. the function) once `import hubdata.connect_hub` has run. This keeps the
+    function bound instead, as was the case when the API was imported eagerly.
+    """
+
+
+    def __setattr__(self, name, value):
+        if isinstance(value, types.ModuleType) and (_LAZY_IMPORTS.get(name) == value.__name__) \
+                and hasattr(value, name):
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _HubdataModule
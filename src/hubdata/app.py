@@ -1,20 +1,14 @@
 
+# NB: only click is imported at module level. heavier dependencies (pyarrow, rich, structlog) are imported inside the
+# subcommands that need them so that `hubdata --help` and the like start quickly
 import click
-import pyarrow as pa
-import structlog
-from rich.console import Console, Group
-from rich.panel import Panel
-
-from hubdata import connect_hub
-from hubdata.logging import setup_logging
-
-setup_logging()
-logger = structlog.get_logger()
 
 
 @click.group()
 def cli():
-    pass
+    from hubdata.logging import setup_logging
+
+    setup_logging()
 
 
 @cli.command(name='schema')
@@ -26,6 +20,11 @@ def print_schema(hub_path):
     :param hub_path: as passed to `connect_hub()`: either a local file system hub path or a cloud-based hub URI.
         Note: A local file system path must be an ABSOLUTE path and not a relative one
     """
+    from rich.console import Console, Group
+    from rich.panel import Panel
+
+    from hubdata import connect_hub
+
     try:
         hub_connection = connect_hub(hub_path)
     except Exception as ex:
@@ -65,6 +64,13 @@ def print_dataset_info(hub_path):
     :param hub_path: as passed to `connect_hub()`: either a local file system hub path or a cloud-based hub URI.
         Note: A local file system path must be an ABSOLUTE path and not a relative one
     """
+    import pyarrow as pa
+    import pyarrow.dataset  # noqa: F401 (makes `pa.dataset` available)
+    from rich.console import Console, Group
+    from rich.panel import Panel
+
+    from hubdata import connect_hub
+
     try:
         hub_connection = connect_hub(hub_path)
     except Exception as ex:
@@ -112,5 +118,134 @@ def print_dataset_info(hub_path):
     )
 
 
+@cli.command(name='export')
+@click.argument('hub_path')
+@click.argument('output_path')
+@click.option('--format', 'file_format', type=click.Choice(['parquet', 'csv', 'arrow']), default='parquet',
+              show_default=True, help='output file format')
+@click.option('--column', 'columns', multiple=True, help='column to export. can be repeated. default: all columns')
+@click.option('--filter', 'filters', multiple=True, metavar='COLUMN=VALUE',
+              help='only export rows where COLUMN equals VALUE. can be repeated, in which case all must match')
+@click.option('--partition-by', multiple=True, help='column to partition output files by. can be repeated')
+@click.option('--max-rows-per-file', default=0, show_default=True, help='maximum rows per file. 0 means no limit')
+@click.option('--max-rows-per-group', default=1024 * 1024, show_default=True, help='maximum rows per row group')
+@click.option('--overwrite', is_flag=True, help='write into OUTPUT_PATH even if it already has files')
+def export(hub_path, output_path, file_format, columns, filters, partition_by, max_rows_per_file, max_rows_per_group,
+           overwrite):
+    """
+    A subcommand that exports model output rows from `hub_path` to files in `output_path` via
+    `HubConnection.export()`, streaming them without loading the entire result into memory.
+
+    :param hub_path: as passed to `connect_hub()`: either a local file system hub path or a cloud-based hub URI.
+        Note: A local file system path must be an ABSOLUTE path and not a relative one
+    :param output_path: the output directory, as passed to `HubConnection.export()`. the same path note applies
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    from hubdata import connect_hub
+
+    try:
+        hub_connection = connect_hub(hub_path)
+    except Exception as ex:
+        print(f'error connecting to hub: {ex}')
+        return
+
+    filter = None
+    for column_value in filters:
+        col_name, sep, value = column_value.partition('=')
+        try:
+            if (not sep) or (col_name not in hub_connection.schema.names):
+                raise ValueError('must be COLUMN=VALUE where COLUMN is in the hub schema')
+
+            expression = pc.field(col_name) == pa.scalar(value).cast(hub_connection.schema.field(col_name).type)
+        except ValueError as ex:  # NB: includes pa.ArrowInvalid cast errors
+            print(f'invalid filter: {column_value!r}: {ex}')
+            return
+
+        filter = expression if filter is None else filter & expression
+
+    try:
+        hub_connection.export(output_path, format=file_format, columns=list(columns) or None, filter=filter,
+                              partition_by=list(partition_by) or None, max_rows_per_file=max_rows_per_file,
+                              max_rows_per_group=max_rows_per_group,
+                              existing_data_behavior='overwrite_or_ignore' if overwrite else 'error')
+    except Exception as ex:
+        print(f'error exporting: {ex}')
+        return
+
+    print(f'exported to {output_path}')
+
+
+@cli.command(name='inventory')
+@click.argument('hub_path')
+@click.option('--format', 'output_format', type=click.Choice(['json', 'arrow']), default='json', show_default=True,
+              help='output format: JSON lines or an Arrow IPC stream')
+@click.option('--output', 'output_path', type=click.Path(dir_okay=False),
+              help='file to write to. default: standard output')
+@click.option('--max-workers', type=int, help='maximum number of files to process concurrently')
+def inventory(hub_path, output_format, output_path, max_workers):
+    """
+    A subcommand that outputs `HubConnection.inventory()` for `hub_path`: one record per model and round with file
+    counts, bytes, rows, formats, and the latest modification time.
+
+    :param hub_path: as passed to `connect_hub()`: either a local file system hub path or a cloud-based hub URI.
+        Note: A local file system path must be an ABSOLUTE path and not a relative one
+    """
+    import json
+
+    import pyarrow as pa
+
+    from hubdata import connect_hub
+
+    try:
+        hub_connection = connect_hub(hub_path)
+    except Exception as ex:
+        print(f'error connecting to hub: {ex}')
+        return
+
+    inventory_table = hub_connection.inventory(max_workers=max_workers)
+    if output_format == 'json':
+        data = ''.join(f'{json.dumps(row, default=str)}\n' for row in inventory_table.to_pylist()).encode()
+    else:  # 'arrow'
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, inventory_table.schema) as writer:
+            writer.write_table(inventory_table)
+        data = sink.getvalue().to_pybytes()
+
+    if output_path:
+        with open(output_path, 'wb') as fp:
+            fp.write(data)
+    else:
+        click.echo(data, nl=False)  # NB: bytes are written to the binary stdout
+
+
+@cli.command(name='serve')
+@click.argument('hub_path')
+@click.option('--host', default='127.0.0.1', show_default=True,
+              help='host to listen on. NB: there is no authentication, so only use trusted networks')
+@click.option('--port', default=8815, show_default=True, help='port to listen on')
+def serve(hub_path, host, port):
+    """
+    A subcommand that serves `hub_path`'s model output over Arrow Flight via `HubFlightServer` until interrupted.
+    Clients query it via `HubFlightClient`.
+
+    :param hub_path: as passed to `connect_hub()`: either a local file system hub path or a cloud-based hub URI.
+        Note: A local file system path must be an ABSOLUTE path and not a relative one
+    """
+    from hubdata import connect_hub
+    from hubdata.flight_server import HubFlightServer
+
+    try:
+        hub_connection = connect_hub(hub_path)
+    except Exception as ex:
+        print(f'error connecting to hub: {ex}')
+        return
+
+    server = HubFlightServer(hub_connection, f'grpc://{host}:{port}')
+    print(f'serving {hub_path} at grpc://{host}:{server.port}. press Ctrl-C to stop')
+    server.serve()
+
+
 if __name__ == '__main__':
     cli()
@@ -1,17 +1,37 @@
 import json
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import numpy as np
 import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.dataset as ds
 import structlog
 from pyarrow import fs
 
 from hubdata.create_hub_schema import create_hub_schema
+from hubdata.filesystems import FilesystemOptionsError, get_filesystem, set_io_thread_count
+from hubdata.inventory import create_inventory
+from hubdata.model_metadata import model_ids_for_filter, read_model_metadata
+from hubdata.quantiles import DEFAULT_QUANTILE_LEVELS, SAMPLE_CONVERSION_OUTPUT_TYPES, convert_samples, quantile_matrix
+from hubdata.result_cache import ResultCache, cache_key, file_set_version
+from hubdata.round_index import create_round_index, plan_round_ids
+from hubdata.scan_profiles import scan_kwargs_for_profile, validate_scan_profile
+from hubdata.scoring import score_quantiles
 
 logger = structlog.get_logger()
 
+PARTITIONING_FLAVORS = ('auto', 'directory', 'hive', 'filename')
 
-def connect_hub(hub_path: str | Path):
+EXPORT_FORMATS = ('parquet', 'csv', 'arrow')
+
+
+def connect_hub(hub_path: str | Path, partitioning: str = 'auto',
+                partitions: tuple[tuple[str, pa.DataType], ...] | None = None, filesystem_options: dict | None = None,
+                io_thread_count: int | None = None, scan_profile: str = 'auto',
+                result_cache: ResultCache | None = None, memory_map: bool = False):
     """
     The main entry point for connecting to a hub, providing access to the instance variables documented in
     `HubConnection`, including admin.json and tasks.json as dicts. It also allows connecting to data in the hub's model
@@ -26,10 +46,38 @@ def connect_hub(hub_path: str | Path):
             Recognized URI schemes are “file”, “mock”, “s3fs”, “gs”, “gcs”, “hdfs” and “viewfs”. In addition, the
             argument can be a local path, either a pathlib.Path object or a str. NB: Passing a local path as a str
             requires an ABSOLUTE path, but passing the hub as a Path can be a relative path.
+    :param partitioning: how the model output directory is partitioned. one of:
+        - 'directory': plain directory names, e.g., `<model_id>/<file>` (the standard hubverse layout)
+        - 'hive': `key=value` directory names, e.g., `model_id=<model_id>/reference_date=<date>/<file>`
+        - 'filename': `_`-separated file name prefixes, e.g., `<model_id>_<file>` (`partitions` is required)
+        - 'auto' (the default): 'hive' if the model output directory's first subdirectory is named `key=value`, and
+          'directory' otherwise
+    :param partitions: a list of 2-tuples (column_name, data_type) naming the partition fields in order, as passed to
+        `create_hub_schema()`. if None then 'directory' partitioning uses `(('model_id', pa.string()),)` and 'hive'
+        partitioning detects the field names from the first path in the model output directory, using the hub schema's
+        types for task-id fields (e.g., a `reference_date` partition is a `pa.date32()`) and `pa.string()` otherwise
+    :param filesystem_options: optional dict of filesystem options such as `region`, `anonymous`, `request_timeout`,
+        `connect_timeout`, and `retry_max_attempts` for S3. cloud filesystems are shared process-wide by all
+        connections to the same bucket with the same options. can't be combined with a URI query string in `hub_path`.
+        see `get_filesystem()`
+    :param io_thread_count: optional size of pyarrow's process-wide I/O thread pool. see `set_io_thread_count()`
+    :param scan_profile: the name of the scan options to use when reading model output: 'local' (pyarrow's defaults),
+        'cloud' (more file and batch read-ahead, suited to high-latency object stores), or 'auto' (the default), which
+        picks 'local' for local file systems and 'cloud' otherwise. see `SCAN_PROFILES`
+    :param result_cache: optional `ResultCache` for `HubConnection.to_table()` results. None (the default) disables
+        caching. a cache can be shared by multiple connections
+    :param memory_map: True to memory-map model output files when reading them (local hubs only). Arrow IPC
+        ('arrow') files are then read zero-copy: scanned data points into the operating system's page cache rather than
+        being copied into each process's memory, so processes reading the same hub share one copy. other formats
+        still need to be decoded, but their reads also come from the shared page cache. False (the default) reads
+        files normally
     :return: a HubConnection
     :raise: RuntimeError if `hub_path` is invalid
+    :raise: ValueError if `partitioning`, `partitions`, `filesystem_options`, `io_thread_count`, `scan_profile`, or
+        `memory_map` is invalid
     """
-    return HubConnection(hub_path)
+    return HubConnection(hub_path, partitioning, partitions, filesystem_options, io_thread_count, scan_profile,
+                         result_cache, memory_map)
 
 
 class HubConnection:
@@ -43,22 +91,76 @@ class HubConnection:
     - admin: the hub's `admin.json` contents as a dict
     - tasks: "" `tasks.json` ""
     - model_output_dir: Path to the hub's model output directory
+    - partitioning: the model output directory's partitioning flavor: 'directory', 'hive', or 'filename'. see
+      `connect_hub()`
+    - partitions: the partition fields as a tuple of 2-tuples (column_name, data_type). these are the `partitions`
+      passed to `create_hub_schema()` when creating `schema`
+    - scan_profile: the name of the `SCAN_PROFILES` entry used for reading model output. see `connect_hub()`
+    - result_cache: the `ResultCache` used by `to_table()`, or None if caching is disabled. see `connect_hub()`
+    - memory_map: True if model output files are memory-mapped when read. see `connect_hub()`
+    - model_metadata: a pa.Table of the hub's `model-metadata` directory contents, one row per model. loaded and cached
+      on first access - see `read_model_metadata()`
+    - round_index: an index of which task-id values and output types are valid in which round, built from `tasks` on
+      first access - see `create_round_index()`
+
+    Thread safety: A single connection can be shared by any number of threads, e.g., by a multi-threaded web server.
+    The instance variables above are set once by the constructor and can't be reassigned (treat the `admin` and
+    `tasks` dicts as read-only too), lazily-loaded ones are initialized exactly once under a lock, and each call to
+    `get_dataset()` and the methods that use it discovers files independently of other calls.
+
+    Process pools: Connections can be pickled, e.g., to pass them to `ProcessPoolExecutor` workers started via the
+    'spawn' or 'forkserver' methods. Their lazily-loaded data is kept, but an in-memory `result_cache` starts out empty
+    in each worker. Avoid using connections (or any pyarrow I/O) across `fork()`: pyarrow's thread pools and cloud
+    filesystem clients aren't fork-safe, so with the 'fork' start method create connections in the workers instead.
     """
 
 
-    def __init__(self, hub_path: str | Path):
+    def __init__(self, hub_path: str | Path, partitioning: str = 'auto',
+                 partitions: tuple[tuple[str, pa.DataType], ...] | None = None, filesystem_options: dict | None = None,
+                 io_thread_count: int | None = None, scan_profile: str = 'auto',
+                 result_cache: ResultCache | None = None, memory_map: bool = False):
         """
         :param hub_path: str or Path pointing to a hub's root directory as passed to `connect_hub()`
+        :param partitioning: "" `connect_hub()`
+        :param partitions: "" `connect_hub()`
+        :param filesystem_options: "" `connect_hub()`
+        :param io_thread_count: "" `connect_hub()`
+        :param scan_profile: "" `connect_hub()`
+        :param result_cache: "" `connect_hub()`
+        :param memory_map: "" `connect_hub()`
         """
-        # set self.hub_path and then get an arrow FileSystem for it, letting it decide the correct subclass based on
-        # that arg, catching any errors. also set two internal instance variables used by HubConnection.get_dataset():
-        # self._filesystem and self._filesystem_path
+        if partitioning not in PARTITIONING_FLAVORS:
+            raise ValueError(f'invalid partitioning: {partitioning!r}. must be one of {PARTITIONING_FLAVORS}')
+
+        validate_scan_profile(scan_profile)
+
+        if io_thread_count is not None:
+            set_io_thread_count(io_thread_count)
+
+        # set self.hub_path and then get an arrow FileSystem for it (possibly a shared one), letting it decide the
+        # correct subclass based on that arg, catching any errors. also set two internal instance variables used by
+        # HubConnection.get_dataset(): self._filesystem and self._filesystem_path
         self.hub_path: str | Path = hub_path
         try:
-            self._filesystem, self._filesystem_path = fs.FileSystem.from_uri(self.hub_path)
-        except Exception:
+            self._filesystem, self._filesystem_path = get_filesystem(self.hub_path, filesystem_options)
+        except FilesystemOptionsError:
+            raise
+        except Exception:  # NB: includes `pyarrow.ArrowInvalid`, which is a ValueError
             raise RuntimeError(f'invalid hub_path: {self.hub_path}')
 
+        # replace a local filesystem with an otherwise identical memory-mapping one if requested
+        if memory_map:
+            if not isinstance(self._filesystem, fs.LocalFileSystem):
+                raise ValueError(f'memory_map is only supported for local hubs, not {type(self._filesystem).__name__}')
+
+            self._filesystem = fs.LocalFileSystem(**(dict(filesystem_options or {}) | {'use_mmap': True}))
+        self.memory_map = memory_map
+
+        if scan_profile == 'auto':
+            scan_profile = 'local' if isinstance(self._filesystem, fs.LocalFileSystem) else 'cloud'
+        self.scan_profile = scan_profile
+        self.result_cache = result_cache
+
         # set self.admin and self.tasks, checking for existence
         try:
             with self._filesystem.open_input_file(f'{self._filesystem_path}/hub-config/admin.json') as admin_fp, \
@@ -68,9 +170,6 @@ class HubConnection:
         except Exception as ex:
             raise RuntimeError(f'admin.json or tasks.json not found: {ex}')
 
-        # set schema
-        self.schema = create_hub_schema(self.tasks)
-
         # set self.model_output_dir, first checking for directory existence
         model_output_dir_name = self.admin['model_output_dir'] if 'model_output_dir' in self.admin else 'model-output'
         model_output_dir = f'{self._filesystem_path}/{model_output_dir_name}'
@@ -78,24 +177,187 @@ class HubConnection:
             logger.warn(f'model_output_dir not found: {model_output_dir!r}')
         self.model_output_dir = model_output_dir
 
+        # set partitioning and partitions, detecting them if necessary, and then set schema from them
+        self.partitioning, self.partitions = self._resolve_partitioning(partitioning, partitions)
+        self.schema = create_hub_schema(self.tasks, partitions=self.partitions)
+
+        # model metadata and the round index are loaded lazily by their properties, guarded by `_lazy_lock`
+        self._model_metadata: pa.Table | None = None
+        self._round_index: list[dict] | None = None
+        self._lazy_lock = threading.Lock()
+        self._is_initialized = True  # public instance variables are read-only from here on - see `__setattr__()`
+
+
+    def __setattr__(self, name, value):
+        if getattr(self, '_is_initialized', False) and not name.startswith('_'):
+            raise AttributeError(f'HubConnection instance variables are read-only: {name!r}')
+
+        super().__setattr__(name, value)
+
 
-    def get_dataset(self) -> ds:
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lazy_lock']  # locks can't be pickled
+        return state
+
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__['_lazy_lock'] = threading.Lock()
+
+
+    def _resolve_partitioning(self, partitioning: str, partitions: tuple[tuple[str, pa.DataType], ...] | None) \
+            -> tuple[str, tuple[tuple[str, pa.DataType], ...]]:
+        """
+        Constructor helper that resolves 'auto' `partitioning` and missing `partitions` as documented in
+        `connect_hub()`.
+
+        :return: a 2-tuple: (partitioning, partitions)
+        """
+        # walk down the first subdirectory at each level, collecting `key=value` names. this lets us both detect hive
+        # partitioning and get its field names
+        hive_keys = []
+        if (partitioning in ['auto', 'hive']) and not partitions:
+            dir_path = self.model_output_dir
+            while True:
+                sub_dirs = sorted([file_info for file_info in self._filesystem.get_file_info(
+                    fs.FileSelector(dir_path, allow_not_found=True)) if file_info.type == fs.FileType.Directory],
+                    key=lambda _: _.base_name)
+                if not sub_dirs or ('=' not in sub_dirs[0].base_name):
+                    break
+
+                hive_keys.append(sub_dirs[0].base_name.split('=', 1)[0])
+                dir_path = sub_dirs[0].path
+
+        if partitioning == 'auto':
+            partitioning = 'hive' if hive_keys else 'directory'
+        if partitions:
+            return partitioning, tuple(partitions)
+
+        if partitioning == 'directory':
+            return partitioning, (('model_id', pa.string()),)
+        elif partitioning == 'hive':
+            if not hive_keys:
+                raise ValueError(f'no hive partitions found in model_output_dir: {self.model_output_dir!r}')
+
+            task_schema = create_hub_schema(self.tasks, partitions=None)
+            return partitioning, tuple((key, task_schema.field(key).type if key in task_schema.names else pa.string())
+                                       for key in hive_keys)
+        else:  # 'filename'
+            raise ValueError('partitions must be passed for filename partitioning')
+
+
+    @property
+    def model_metadata(self) -> pa.Table:
+        """
+        :return: a pa.Table of the hub's model metadata, one row per model, sorted by `model_id`. it is read from the
+            hub's `model-metadata` directory on first access and then cached
         """
+        if self._model_metadata is None:
+            with self._lazy_lock:
+                if self._model_metadata is None:  # another thread might have loaded it while we waited for the lock
+                    self._model_metadata = read_model_metadata(self._filesystem,
+                                                               f'{self._filesystem_path}/model-metadata')
+        return self._model_metadata
+
+
+    def model_ids(self, model_filter: pc.Expression) -> list[str]:
+        """
+        :param model_filter: a `pyarrow.compute.Expression` over `model_metadata` columns, e.g.,
+            `pc.field('designated_model') == True` or `pc.field('ensemble_of_hub_models') == True`
+        :return: sorted list of the `model_id`s whose metadata matches `model_filter`
+        :raise: ValueError if `model_filter` is invalid for `model_metadata`
+        """
+        return model_ids_for_filter(self.model_metadata, model_filter)
+
+
+    @property
+    def round_index(self) -> list[dict]:
+        """
+        :return: the hub's round index as returned by `create_round_index()`. it is built on first access and then
+            cached
+        """
+        if self._round_index is None:
+            with self._lazy_lock:
+                if self._round_index is None:  # ""
+                    self._round_index = create_round_index(self.tasks, self.schema)
+        return self._round_index
+
+
+    def round_ids(self, filter: pc.Expression) -> list[str] | None:
+        """
+        :param filter: a `pyarrow.compute.Expression` over model output columns, as passed to `to_table()`
+        :return: list of the round ids whose `tasks.json` configuration allows rows matching `filter`, or None if
+            `filter` can't be planned (see `plan_round_ids()`)
+        """
+        return plan_round_ids(self.round_index, filter, self.schema)
+
+
+    def get_dataset(self, model_filter: pc.Expression | None = None, filter: pc.Expression | None = None,
+                    model_ids: list[str] | None = None, round_ids: list[str] | None = None) -> ds:
+        """
+        Returns a dataset for my model output files, optionally limited to some models and rounds. Where the layout
+        allows it, those limits are applied while listing files (so other files are never listed or opened) rather than
+        afterward:
+        - models: if `model_id` is the first directory partition level (as in the standard
+          `<model_id>/<round_id>-<model_id>.<ext>` layout) then only the requested models' directories are listed
+        - rounds: with the standard layout, only listed files whose names start with a requested round id are kept.
+          this doesn't reduce listing (without model limits all of model_output_dir is listed), but other rounds' files
+          are never opened
+
+        In other layouts the dataset is instead filtered on the `model_id` and round id columns, which pyarrow uses to
+        prune fragments by partition where possible. Limits from the args below are combined, i.e., a file must satisfy
+        all of them.
+
+        :param model_filter: optional `pyarrow.compute.Expression` over `model_metadata` columns (see `model_ids()`)
+            limiting the dataset to the matching models
+        :param filter: optional `pyarrow.compute.Expression` over model output columns that is used only to prune
+            files: for hubs with the standard layout, files whose round can't match `filter` per `round_ids()` are
+            excluded from the dataset. NB: the filter itself is not applied, so pass it to the dataset's scan too.
+            (`to_table()` does both for you)
+        :param model_ids: optional list of model ids to limit the dataset to
+        :param round_ids: optional list of round id strings (as in model output file names, e.g., '2022-10-08') to limit
+            the dataset to
         :return: a pyarrow.dataset.Dataset for my model_output_dir
+        :raise: ValueError if `round_ids` is passed for a non-standard layout and not all rounds' ids come from a
+            task-id variable
         """
-        # create the dataset. NB: we are using dataset "directory partitioning" to automatically get the `model_id`
-        # column from directory names
+        # create the dataset. NB: we are using dataset partitioning to automatically get the `model_id` column (and any
+        # other partition fields) from directory or file names
 
         # NB: we force file_formats to .parquet if not a LocalFileSystem (e.g., an S3FileSystem). otherwise we use the
         # list from self.admin['file_format']
         file_formats = ['parquet'] if not isinstance(self._filesystem, fs.LocalFileSystem) \
             else self.admin['file_format']
-        schema = create_hub_schema(self.tasks)
-        datasets = [ds.dataset(self.model_output_dir, filesystem=self._filesystem, format=file_format,
-                               partitioning=['model_id'],  # NB: hard-coded partitioning!
-                               exclude_invalid_files=True, schema=schema)
+
+        # combine the model and round limits
+        if model_filter is not None:
+            filter_model_ids = self.model_ids(model_filter)
+            model_ids = filter_model_ids if model_ids is None \
+                else [model_id for model_id in model_ids if model_id in filter_model_ids]
+        is_standard_layout = (self.partitioning == 'directory') and (self.partitions == (('model_id', pa.string()),))
+        filter_round_ids = self.round_ids(filter) if (filter is not None) and is_standard_layout else None
+        if filter_round_ids is not None:
+            round_ids = filter_round_ids if round_ids is None \
+                else [round_id for round_id in round_ids if round_id in filter_round_ids]
+
+        # decide which limits can be applied while listing, and which must be dataset filters
+        is_model_dir_layout = (self.partitioning != 'filename') and (self.partitions[0][0] == 'model_id')
+        dataset_filters = []
+        if (model_ids is not None) and not is_model_dir_layout:
+            dataset_filters.append(pc.field('model_id').isin(model_ids))
+        if (round_ids is not None) and not is_standard_layout:
+            dataset_filters.append(self._round_ids_filter(round_ids))
+        file_paths = self._model_output_file_paths(model_ids if is_model_dir_layout else None,
+                                                   round_ids if is_standard_layout else None)
+
+        datasets = [self._dataset_for_file_format(file_format, self.schema, file_paths, dataset_filters)
                     for file_format in file_formats]
-        datasets = [dataset for dataset in datasets if len(dataset.files) != 0]
+        non_empty_datasets = [dataset for dataset in datasets if len(dataset.files) != 0]
+        if not non_empty_datasets:  # e.g., no rounds or models match. keep one empty dataset to retain the schema
+            return datasets[0]
+
+        datasets = non_empty_datasets
         if len(datasets) == 1:
             return datasets[0]
         else:
@@ -103,9 +365,347 @@ class HubConnection:
                                if isinstance(dataset, pa.dataset.FileSystemDataset) and (len(dataset.files) != 0)])
 
 
-    def to_table(self, *args, **kwargs) -> pa.Table:
+    def _model_output_file_paths(self, model_ids: list[str] | None, round_ids: list[str] | None) -> list[str] | None:
+        """
+        `get_dataset()` helper that lists the model output files for `model_ids` and `round_ids`. If both are None then
+        returns None, meaning pyarrow should discover the entire model_output_dir. Otherwise lists only the directories
+        for `model_ids` (or all of model_output_dir if None), keeping only files whose names start with one of
+        `round_ids` (if not None). Files of all formats are listed at once, i.e., each directory is listed only once.
+        """
+        if (model_ids is None) and (round_ids is None):
+            return None
+
+        if model_ids is None:
+            dir_paths = [self.model_output_dir]
+        else:
+            dir_paths = [f'{self.model_output_dir}/model_id={model_id}' if self.partitioning == 'hive'
+                         else f'{self.model_output_dir}/{model_id}' for model_id in model_ids]
+        file_selectors = [fs.FileSelector(dir_path, allow_not_found=True, recursive=True) for dir_path in dir_paths]
+        round_id_prefixes = tuple(f'{round_id}-' for round_id in round_ids) if round_ids is not None else None
+        return [file_info.path for file_selector in file_selectors
+                for file_info in self._filesystem.get_file_info(file_selector)
+                if (file_info.type == fs.FileType.File) and not file_info.base_name.startswith(('.', '_'))
+                and ((round_id_prefixes is None) or file_info.base_name.startswith(round_id_prefixes))]
+
+
+    def _dataset_for_file_format(self, file_format: str, schema: pa.Schema, file_paths: list[str] | None,
+                                 dataset_filters: list[pc.Expression]) -> ds.FileSystemDataset:
+        """
+        `get_dataset()` helper that returns a FileSystemDataset for `file_format` files. If `file_paths` is None then
+        the entire model_output_dir is discovered. Otherwise, the `file_format` files in `file_paths` are passed to
+        pyarrow along with `partition_base_dir` so that partition fields are still parsed from directory names. The
+        result is filtered by `dataset_filters` (if any).
+        """
+        partitioning = ds.partitioning(pa.schema(self.partitions),
+                                       flavor=None if self.partitioning == 'directory' else self.partitioning)
+        if file_paths is None:
+            dataset = ds.dataset(self.model_output_dir, filesystem=self._filesystem,
+                                 format=file_format,
+                                 partitioning=partitioning, exclude_invalid_files=True, schema=schema)
+        else:
+            dataset = ds.dataset([file_path for file_path in file_paths if file_path.endswith(f'.{file_format}')],
+                                 filesystem=self._filesystem,
+                                 format=file_format,
+                                 partitioning=partitioning, partition_base_dir=self.model_output_dir,
+                                 exclude_invalid_files=True, schema=schema)
+        for dataset_filter in dataset_filters:
+            dataset = dataset.filter(dataset_filter)
+        return dataset
+
+
+    def _round_ids_filter(self, round_ids: list[str]) -> pc.Expression:
         """
-        A helper function that simply passes args and kwargs to `pyarrow.dataset.Dataset.to_table()`, returning the
-        `pyarrow.Table`.
+        `get_dataset()` helper that returns a filter selecting `round_ids`' rows via the rounds' round id columns.
+
+        :raise: ValueError if not all rounds' ids come from a task-id variable
+        """
+        round_id_columns = {round_entry['round_id_column'] for round_entry in self.round_index}
+        if (not round_id_columns) or (None in round_id_columns):
+            raise ValueError("round_ids can only be passed for this hub's model output layout if all rounds' ids come "
+                             "from a task-id variable")
+
+        round_ids_filter = None
+        for round_id_column in sorted(round_id_columns):
+            column_filter = pc.field(round_id_column).isin(
+                pa.array(round_ids, pa.string()).cast(self.schema.field(round_id_column).type))
+            round_ids_filter = column_filter if round_ids_filter is None else round_ids_filter | column_filter
+        return round_ids_filter
+
+
+    def to_table(self, *args, model_filter: pc.Expression | None = None, model_ids: list[str] | None = None,
+                 round_ids: list[str] | None = None, **kwargs) -> pa.Table:
+        """
+        A helper function that passes args and kwargs to `pyarrow.dataset.Dataset.to_table()`, returning the
+        `pyarrow.Table`. kwargs default to the `scan_profile`'s scan options (e.g., `fragment_readahead`), which
+        explicitly passed kwargs override. The `filter` arg (if any) is also passed to `get_dataset()` so that files
+        from rounds that can't match it are skipped.
+
+        If I have a `result_cache` then results are cached by my location, hub config (`admin`, `tasks`, and `schema`),
+        args, kwargs, model ids, and a version of my model output files (see `file_set_version()`), so repeated queries
+        aren't rescanned until the config or files change. NB: computing the version lists the model output directory on
+        every call.
+
+        :param model_filter: passed to `get_dataset()`
+        :param model_ids: ""
+        :param round_ids: ""
+        """
+        if self.result_cache is None:
+            return self._to_table(*args, model_filter=model_filter, model_ids=model_ids, round_ids=round_ids, **kwargs)
+
+        key = cache_key(self.hub_path, self.model_output_dir, self.partitioning, self.partitions, self.schema,
+                        self.admin, self.tasks, file_set_version(self._filesystem, self.model_output_dir),
+                        self.model_ids(model_filter) if model_filter is not None else None, model_ids, round_ids,
+                        args, sorted(kwargs.items()))
+        table = self.result_cache.get(key)
+        if table is None:
+            table = self._to_table(*args, model_filter=model_filter, model_ids=model_ids, round_ids=round_ids,
+                                   **kwargs)
+            self.result_cache.put(key, table)
+        return table
+
+
+    def _to_table(self, *args, model_filter: pc.Expression | None = None, model_ids: list[str] | None = None,
+                  round_ids: list[str] | None = None, **kwargs) -> pa.Table:
+        """
+        `to_table()` helper that does the actual scan.
+        """
+        filter = kwargs.get('filter', args[1] if len(args) > 1 else None)
+        return self.get_dataset(model_filter=model_filter, filter=filter, model_ids=model_ids, round_ids=round_ids) \
+            .to_table(*args, **scan_kwargs_for_profile(self.scan_profile, **kwargs))
+
+
+    def _round_filters(self) -> list[pc.Expression | None]:
+        """
+        Helper for methods that process model output one round at a time.
+
+        :return: list of filters that each select one round id's rows if all rounds' round ids come from a task-id
+            variable, or [None] (i.e., all rows at once) otherwise
+        """
+        if not self.round_index or not all(round_entry['round_id_column'] for round_entry in self.round_index):
+            return [None]
+
+        # NB: a round id can be in more than one round, so we use a dict to remove duplicates while preserving order
+        column_round_ids = {(round_entry['round_id_column'], round_id): None for round_entry in self.round_index
+                            for round_id in round_entry['round_ids']}
+        return [pc.field(round_id_column) == pa.scalar(round_id).cast(self.schema.field(round_id_column).type)
+                for round_id_column, round_id in column_round_ids]
+
+
+    def _map_rounds(self, fcn: Callable[[pa.Table], pa.Table], filter: pc.Expression,
+                    model_filter: pc.Expression | None, max_workers: int | None) -> list[pa.Table]:
+        """
+        Helper for methods that process model output one round at a time, with rounds processed in parallel. With the
+        standard layout, files are listed once and then grouped by the round id in their names, so each round's scan
+        only opens that round's files. Other layouts are scanned once, with the result split by `_round_filters()`.
+
+        :param fcn: function that's passed a pa.Table of one round's rows that match `filter`, returning a pa.Table
+        :param filter: a `pyarrow.compute.Expression` limiting the rows passed to `fcn`
+        :param model_filter: passed to `get_dataset()`
+        :param max_workers: maximum number of rounds to process concurrently. None uses `ThreadPoolExecutor`'s default
+        :return: list of `fcn`'s results, one per round that has files (or one for all rows if there are none)
+        """
+        hub_ds = self.get_dataset(model_filter=model_filter, filter=filter)
+        scan_kwargs = scan_kwargs_for_profile(self.scan_profile)
+        is_standard_layout = (self.partitioning == 'directory') and (self.partitions == (('model_id', pa.string()),))
+        if not is_standard_layout:
+            table = hub_ds.to_table(filter=filter, **scan_kwargs)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                return list(executor.map(lambda round_filter: fcn(table if round_filter is None
+                                                                  else table.filter(round_filter)),
+                                         self._round_filters()))
+
+        # group each file format dataset's fragments by round. NB: a round id can be in more than one round, so we use
+        # a dict to remove duplicates while preserving order. files whose names don't start with a known round id are
+        # grouped together, last
+        round_id_prefixes = {f'{round_id}-': None for round_entry in self.round_index
+                             for round_id in round_entry['round_ids']}
+        file_format_datasets = hub_ds.children if isinstance(hub_ds, ds.UnionDataset) else [hub_ds]
+        round_fragments = {prefix: {} for prefix in [*round_id_prefixes, None]}  # prefix -> dataset index -> fragments
+        for dataset_idx, file_format_ds in enumerate(file_format_datasets):
+            for fragment in file_format_ds.get_fragments():
+                base_name = fragment.path.rsplit('/', 1)[-1]
+                round_id_prefix = next((prefix for prefix in round_id_prefixes if base_name.startswith(prefix)), None)
+                round_fragments[round_id_prefix].setdefault(dataset_idx, []).append(fragment)
+        round_datasets = [ds.dataset([ds.FileSystemDataset(fragments, self.schema,
+                                                           file_format_datasets[dataset_idx].format, self._filesystem)
+                                      for dataset_idx, fragments in dataset_fragments.items()])
+                          for dataset_fragments in round_fragments.values() if dataset_fragments] or [hub_ds]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda round_ds: fcn(round_ds.to_table(filter=filter, **scan_kwargs)),
+                                     round_datasets))
+
+
+    def get_target_data(self, target_type: str = 'oracle-output') -> pa.Table:
+        """
+        Reads the hub's target data of type `target_type` as described at
+        https://docs.hubverse.io/en/latest/user-guide/target-data.html . The data can be either a single file
+        (`target-data/<target_type>.csv` or `.parquet`) or a directory of files (`target-data/<target_type>/`).
+        Columns that are in `schema` (e.g., task-id columns) are cast to the schema's types so that they can be joined
+        to model output.
+
+        :param target_type: either 'oracle-output' or 'time-series'
+        :return: a pa.Table of the target data
+        :raise: RuntimeError if the target data is not found
+        """
+        target_data_dir = f'{self._filesystem_path}/target-data'
+        for path, file_format in [(f'{target_data_dir}/{target_type}.csv', 'csv'),
+                                  (f'{target_data_dir}/{target_type}.parquet', 'parquet'),
+                                  (f'{target_data_dir}/{target_type}', 'parquet'),
+                                  (f'{target_data_dir}/{target_type}', 'csv')]:
+            file_info = self._filesystem.get_file_info(path)
+            if file_info.type == fs.FileType.NotFound:
+                continue
+
+            target_ds = ds.dataset(path, filesystem=self._filesystem, format=file_format, exclude_invalid_files=True)
+            if (file_info.type == fs.FileType.Directory) and (len(target_ds.files) == 0):
+                continue
+
+            target_table = target_ds.to_table()
+            for field in self.schema:
+                if field.name in target_table.column_names:
+                    target_table = target_table.set_column(target_table.column_names.index(field.name), field.name,
+                                                           pc.cast(target_table[field.name], field.type))
+            return target_table
+
+        raise RuntimeError(f'target data not found: {target_type!r}')
+
+
+    def export(self, path: str | Path, format: str = 'parquet', columns: list[str] | None = None,
+               filter: pc.Expression | None = None, partition_by: list[str] | None = None,
+               model_filter: pc.Expression | None = None, max_rows_per_file: int = 0,
+               max_rows_per_group: int = 1024 * 1024, existing_data_behavior: str = 'error') -> None:
+        """
+        Writes the rows of my dataset that match `filter` to `path`. Rows are streamed from the scan straight to the
+        writer in batches (via `pyarrow.dataset.write_dataset()`) and files are written by multiple threads, so the
+        full result is never held in memory. This makes it possible to export subsets of hubs that are larger than
+        RAM.
+
+        :param path: the output directory: either a local file system Path or a URI, as with `connect_hub()`'s
+            `hub_path`. cloud URIs share filesystems with hub connections - see `get_filesystem()`
+        :param format: output file format: one of `EXPORT_FORMATS`
+        :param columns: optional list of column names to export. None exports all columns
+        :param filter: optional `pyarrow.compute.Expression` limiting the exported rows. as with `to_table()`, it's also
+            used to skip files from rounds that can't match it
+        :param partition_by: optional list of column names to partition the output by, using hive-style
+            `<column>=<value>` directories. None writes all files directly into `path`. partition columns are added to
+            `columns` if missing, because their values are stored in the directory names rather than in the files
+        :param model_filter: passed to `get_dataset()`
+        :param max_rows_per_file: maximum number of rows per output file. 0 means no limit
+        :param max_rows_per_group: maximum number of rows per parquet row group (or arrow record batch)
+        :param existing_data_behavior: what to do if `path` already has data: 'error', 'overwrite_or_ignore', or
+            'delete_matching'. see `pyarrow.dataset.write_dataset()`
+        :raise: ValueError if `format` is invalid or `partition_by` has a column that's not in my schema
+        """
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f'invalid format: {format!r}. must be one of {EXPORT_FORMATS}')
+
+        if partition_by:
+            bad_col_names = [col_name for col_name in partition_by if col_name not in self.schema.names]
+            if bad_col_names:
+                raise ValueError(f'invalid partition_by column(s): {bad_col_names}. must be in {self.schema.names}')
+
+            if columns is not None:
+                columns = columns + [col_name for col_name in partition_by if col_name not in columns]
+
+        filesystem, base_dir = get_filesystem(path)
+        scanner = self.get_dataset(model_filter=model_filter, filter=filter) \
+            .scanner(columns=columns, filter=filter, **scan_kwargs_for_profile(self.scan_profile))
+        partitioning = ds.partitioning(pa.schema([scanner.projected_schema.field(col_name)
+                                                  for col_name in partition_by]), flavor='hive') \
+            if partition_by else None
+
+        # small input files produce small batches, so we buffer rows to avoid writing many tiny row groups. NB: pyarrow
+        # requires min_rows_per_group <= max_rows_per_group <= max_rows_per_file
+        if max_rows_per_file:
+            max_rows_per_group = min(max_rows_per_group, max_rows_per_file)
+        ds.write_dataset(scanner, base_dir, filesystem=filesystem, format=format, partitioning=partitioning,
+                         use_threads=True, max_rows_per_file=max_rows_per_file,
+                         min_rows_per_group=min(max_rows_per_group, 64 * 1024), max_rows_per_group=max_rows_per_group,
+                         existing_data_behavior=existing_data_behavior)
+
+
+    def inventory(self, max_workers: int | None = None) -> pa.Table:
+        """
+        Reports on my model output files per model and round without scanning their data (except for csv files, whose
+        rows must be counted by parsing them). Useful for monitoring submissions.
+
+        :param max_workers: passed to `create_inventory()`
+        :return: a pa.Table as documented in `create_inventory()`
+        """
+        return create_inventory(self.get_dataset(), self._filesystem, self.model_output_dir, max_workers)
+
+
+    def quantile_matrix(self, filter: pc.Expression | None = None, model_filter: pc.Expression | None = None) \
+            -> tuple[pa.Table, np.ndarray, np.ndarray]:
+        """
+        Loads the hub's quantile forecasts and pivots them into a dense matrix via `quantile_matrix()`. Only quantile
+        rows are read, and (via `to_table()`) files from rounds without quantile outputs are skipped.
+
+        :param filter: optional `pyarrow.compute.Expression` to further limit the forecasts
+        :param model_filter: passed to `to_table()`
+        :return: a 3-tuple: (keys, levels, values) as documented in `quantile_matrix()`
+        """
+        quantile_filter = pc.field('output_type') == 'quantile'
+        if filter is not None:
+            quantile_filter = quantile_filter & filter
+        return quantile_matrix(self.to_table(filter=quantile_filter, model_filter=model_filter))
+
+
+    def convert_samples(self, filter: pc.Expression | None = None, model_filter: pc.Expression | None = None,
+                        output_types: tuple[str, ...] = SAMPLE_CONVERSION_OUTPUT_TYPES,
+                        quantile_levels: tuple[float, ...] = DEFAULT_QUANTILE_LEVELS,
+                        max_workers: int | None = None) -> pa.Table:
+        """
+        Summarizes the hub's sample forecasts into quantile, mean, and/or median rows via `convert_samples()`. Like
+        `score_quantiles()`, sample rows are streamed one round at a time (see `_map_rounds()`) and rounds are converted
+        in parallel. Units never span rounds, and the converted rounds are sorted back into `convert_samples()`'s row
+        order, so this gives the same result as converting all samples at once.
+
+        :param filter: optional `pyarrow.compute.Expression` to further limit the samples being converted
+        :param model_filter: passed to `get_dataset()`
+        :param output_types: passed to `convert_samples()`
+        :param quantile_levels: ""
+        :param max_workers: maximum number of rounds to convert concurrently. None uses `ThreadPoolExecutor`'s default
+        :return: a pa.Table as documented in `convert_samples()`
+        """
+        base_filter = pc.field('output_type') == 'sample'
+        if filter is not None:
+            base_filter = base_filter & filter
+        converted = pa.concat_tables(self._map_rounds(
+            lambda samples: convert_samples(samples, output_types, quantile_levels), base_filter, model_filter,
+            max_workers))
+
+        # order rows by output type, then unit, then quantile level. NB: `sort_by()` is stable, so each unit's levels
+        # keep their order
+        key_col_names = [col_name for col_name in converted.column_names
+                         if col_name not in ('output_type', 'output_type_id', 'value')]
+        output_type_indices = pc.index_in(converted['output_type'], pa.array(output_types))
+        return converted.append_column('_output_type_index', output_type_indices) \
+            .sort_by([('_output_type_index', 'ascending')] + [(col_name, 'ascending') for col_name in key_col_names]) \
+            .drop_columns(['_output_type_index'])
+
+
+    def score_quantiles(self, oracle_output: pa.Table | None = None, filter: pc.Expression | None = None,
+                        interval_levels: tuple[int, ...] = (50, 90), max_workers: int | None = None) -> pa.Table:
+        """
+        Scores the hub's quantile forecasts against observed values via `score_quantiles()`. Rather than loading all
+        model output at once, the data is streamed one round at a time, with rounds scanned and scored in parallel.
+        Each round's scan only opens that round's files (for hubs with the standard layout - other layouts are scanned
+        once and then split by round, for rounds whose round id comes from a task-id variable). see `_map_rounds()`
+
+        :param oracle_output: observed values as documented in `score_quantiles()`. defaults to
+            `get_target_data('oracle-output')`
+        :param filter: optional `pyarrow.compute.Expression` to further limit the forecasts being scored
+        :param interval_levels: passed to `score_quantiles()`
+        :param max_workers: maximum number of rounds to score concurrently. None uses `ThreadPoolExecutor`'s default
+        :return: a pa.Table as documented in `score_quantiles()`
         """
-        return self.get_dataset().to_table(*args, **kwargs)
+        if oracle_output is None:
+            oracle_output = self.get_target_data('oracle-output')
+        base_filter = pc.field('output_type') == 'quantile'
+        if filter is not None:
+            base_filter = base_filter & filter
+        scores = self._map_rounds(lambda forecasts: score_quantiles(forecasts, oracle_output, interval_levels),
+                                  base_filter, None, max_workers)
+        return pa.concat_tables(scores).sort_by([(col_name, 'ascending') for col_name in scores[0].column_names
+                                                 if col_name in self.schema.names])
@@ -1,4 +1,3 @@
-import json
 from collections import defaultdict
 from datetime import date
 
@@ -123,46 +122,44 @@ def _pa_type_for_req_and_opt_vals(required: list | None, optional: list | None)
     or None if no values passed or only "NA" passed. Note that a non-string data type is returned only if the merger of
     `required` and `optional` contains items all the same type.
 
+    Values are classified in bulk by their Python types rather than one at a time, which matters for long value lists
+    (e.g., hundreds of locations or dates): numbers are typed by `type()` alone, duplicate strings are checked once,
+    and checking stops at the first string that's not a date because any string makes the result `pa.string()`.
+
     :param required: from the "required" field of a rounds.model_tasks.task_ids value
     :param optional: "" "optional" ""
     :return: a pa.DataType or None
     """
-
-
-    def is_number(value, is_float):
-        if type(value) is (float if is_float else int):
-            return True
-        try:
-            return json.loads(value) is (float if is_float else int)
-        except Exception:
-            return False
-
-
-    def is_date(value):
-        try:
-            return date.fromisoformat(value)  # non-False
-        except Exception:
-            return False
-
-
     req_and_opt_vals = (required if required else []) + (optional if optional else [])
+    value_types = {type(value) for value in req_and_opt_vals}
     pa_types = []
-    for value in req_and_opt_vals:
-        # try parsing in this order: NA, pa.date32, pa.float64, pa.int32
-        pa_type = pa.string()
-        if value == 'NA':
-            continue  # special case: NA should not influence returned type
-        elif is_date(value):  # date
-            pa_type = pa.date32()
-        elif is_number(value, True):  # float
-            pa_type = pa.float64()
-        elif is_number(value, False):  # int
-            pa_type = pa.int32()
-        pa_types.append(pa_type)
+    if str in value_types:
+        value_types.remove(str)
+        str_vals = {value for value in req_and_opt_vals if type(value) is str}
+        str_vals.discard('NA')  # special case: NA should not influence returned type
+        if str_vals and not all(_is_date(value) for value in str_vals):
+            return pa.string()  # any string overrides all other types
+
+        if str_vals:
+            pa_types.append(pa.date32())
+    if float in value_types:
+        pa_types.append(pa.float64())
+    if int in value_types:
+        pa_types.append(pa.int32())
+    if value_types - {float, int}:  # e.g., bool or None
+        pa_types.append(pa.string())
 
     return _pa_type_simplest_for_pa_types(pa_types) if pa_types else None
 
 
+def _is_date(value: str) -> bool:
+    try:
+        date.fromisoformat(value)
+        return True
+    except ValueError:
+        return False
+
+
 def _pa_type_simplest_for_pa_types(pa_types: list[pa.DataType]) -> pa.DataType:
     """
     Given a list of pa.DataTypes, return the "simplest" one based on the below logic.
@@ -0,0 +1,130 @@
+import os
+import threading
+from collections.abc import Hashable
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pyarrow as pa
+from pyarrow import fs
+
+# URI schemes whose filesystems are shared via the registry. these are the ones where creating a filesystem is costly
+# (e.g., credential lookup and bucket region resolution)
+CLOUD_SCHEMES = ('s3', 'gs', 'gcs')
+
+
+class FilesystemOptionsError(ValueError):
+    """
+    Raised by `get_filesystem()` when `filesystem_options` are passed for a filesystem that doesn't support them.
+    """
+
+
+_registry: dict[tuple, fs.FileSystem] = {}  # see `_registry_key()` for keys
+_registry_lock = threading.Lock()
+
+
+def get_filesystem(hub_path: str | Path, filesystem_options: dict | None = None) -> tuple[fs.FileSystem, str]:
+    """
+    Returns a pyarrow FileSystem and path for `hub_path`. Cloud filesystems (those in `CLOUD_SCHEMES`) are created
+    once per scheme, bucket, and `filesystem_options`, and then shared process-wide by all callers so that client setup
+    (credentials, region resolution, connection pools) is paid only once. Other filesystems are created via
+    `pyarrow.fs.FileSystem.from_uri()`.
+
+    :param hub_path: as passed to `connect_hub()`
+    :param filesystem_options: optional dict of keyword arguments passed to the filesystem class's constructor, e.g.,
+        `pyarrow.fs.S3FileSystem` options like `region`, `anonymous`, `request_timeout`, `connect_timeout`, and
+        `retry_strategy`, or `pyarrow.fs.LocalFileSystem` options like `use_mmap`. For S3 the additional convenience
+        option `retry_max_attempts` (an int) is translated to an `AwsStandardS3RetryStrategy`
+    :return: a 2-tuple: (filesystem, path) where path is `hub_path`'s path within filesystem
+    :raise: FilesystemOptionsError (a ValueError) if `filesystem_options` are passed for an unsupported filesystem, or
+        along with a cloud URI that has a query string (e.g., `s3://bucket?endpoint_override=...`). in the latter case,
+        pass the query string's options as `filesystem_options` instead
+    """
+    filesystem_options = dict(filesystem_options) if filesystem_options else {}
+    url_parts = urlsplit(hub_path) if isinstance(hub_path, str) else None
+    if (url_parts is None) or (url_parts.scheme not in CLOUD_SCHEMES):
+        filesystem, path = fs.FileSystem.from_uri(hub_path)
+        if filesystem_options:
+            if not isinstance(filesystem, fs.LocalFileSystem):
+                raise FilesystemOptionsError(f'filesystem_options are not supported for {type(filesystem).__name__}')
+            filesystem = fs.LocalFileSystem(**filesystem_options)
+        return filesystem, path
+
+    if filesystem_options and url_parts.query:
+        raise FilesystemOptionsError(f'filesystem_options cannot be combined with a URI query string: '
+                                     f'{url_parts.query!r}. pass its options as filesystem_options instead')
+
+    path = f'{url_parts.netloc}{url_parts.path}'.rstrip('/')
+    if (url_parts.scheme == 's3') and ('retry_max_attempts' in filesystem_options):
+        filesystem_options['retry_strategy'] = fs.AwsStandardS3RetryStrategy(
+            max_attempts=filesystem_options.pop('retry_max_attempts'))
+    key = _registry_key(url_parts.scheme, url_parts.netloc, url_parts.query, filesystem_options)
+    with _registry_lock:
+        if key not in _registry:
+            _registry[key] = _create_cloud_filesystem(url_parts, filesystem_options)
+        return _registry[key], path
+
+
+def clear_filesystem_registry():
+    """
+    Removes all shared filesystems from the registry, e.g., after credentials have changed.
+    """
+    with _registry_lock:
+        _registry.clear()
+
+
+def set_io_thread_count(io_thread_count: int):
+    """
+    Sets the size of pyarrow's process-wide I/O thread pool, which is used for concurrent reads from (primarily cloud)
+    filesystems. Larger pools help with high-latency storage. See `pyarrow.set_io_thread_count()`.
+
+    :param io_thread_count: number of I/O threads. must be positive
+    :raise: ValueError if `io_thread_count` is invalid
+    """
+    if io_thread_count < 1:
+        raise ValueError(f'invalid io_thread_count: {io_thread_count}')
+
+    pa.set_io_thread_count(io_thread_count)
+
+
+def _reset_registry_after_fork():
+    # cloud filesystem clients (and the lock) can't be used in a forked child, so it starts out with an empty registry
+    global _registry_lock
+    _registry_lock = threading.Lock()
+    _registry.clear()
+
+
+os.register_at_fork(after_in_child=_reset_registry_after_fork)
+
+
+def _registry_key(scheme: str, bucket: str, query: str, filesystem_options: dict) -> tuple:
+    return ('gcs' if scheme == 'gs' else scheme), bucket, query, \
+        tuple(sorted((name, _option_key(value)) for name, value in filesystem_options.items()))
+
+
+def _option_key(value) -> Hashable:
+    # equivalent option values must have equal keys so that their connections share a filesystem. retry strategies
+    # don't define equality (and their reprs include their addresses), so we use their type and parameters. other
+    # unhashable values (e.g., `proxy_options` dicts) use their items, or their reprs as a last resort
+    if isinstance(value, fs.S3RetryStrategy):
+        return type(value).__name__, value.max_attempts
+    elif isinstance(value, dict):
+        return tuple(sorted((name, _option_key(item_value)) for name, item_value in value.items()))
+    elif isinstance(value, Hashable):
+        return value
+    else:
+        return repr(value)
+
+
+def _create_cloud_filesystem(url_parts, filesystem_options: dict) -> fs.FileSystem:
+    if not filesystem_options:
+        # let pyarrow do its usual URI handling, including S3 region resolution and query string options
+        query = f'?{url_parts.query}' if url_parts.query else ''
+        filesystem, _ = fs.FileSystem.from_uri(f'{url_parts.scheme}://{url_parts.netloc}{query}')
+        return filesystem
+
+    if url_parts.scheme == 's3':
+        if ('region' not in filesystem_options) and ('endpoint_override' not in filesystem_options):
+            filesystem_options['region'] = fs.resolve_s3_region(url_parts.netloc)
+        return fs.S3FileSystem(**filesystem_options)
+    else:  # 'gs', 'gcs'
+        return fs.GcsFileSystem(**filesystem_options)
@@ -0,0 +1,182 @@
+import functools
+import json
+import operator
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.flight as flight
+
+from hubdata.connect_hub import HubConnection
+from hubdata.scan_profiles import scan_kwargs_for_profile
+
+DEFAULT_LOCATION = 'grpc://127.0.0.1:8815'
+
+# the path of the single flight that `HubFlightServer` serves
+FLIGHT_PATH = 'model-output'
+
+_COMPARISON_OPS = {'==': operator.eq, '!=': operator.ne, '<': operator.lt, '<=': operator.le, '>': operator.gt,
+                   '>=': operator.ge}
+
+# the condition operators of filter specs. see `filter_from_spec()`
+FILTER_OPS = (*_COMPARISON_OPS, 'in', 'is_null', 'is_valid')
+
+
+class HubFlightServer(flight.FlightServerBase):
+    """
+    An Arrow Flight server that keeps a `HubConnection` and its discovered dataset in memory and answers queries from
+    many clients (see `HubFlightClient`), so that the cost of discovering the hub's files is paid once per server
+    rather than once per client. Query results are streamed to clients as record batches while they're scanned.
+
+    Queries are encoded in tickets (and flight descriptor commands) as JSON with two keys: 'columns' (a list of column
+    names, or null for all columns) and 'filter' (a filter spec as documented in `filter_from_spec()`, or null for all
+    rows). See `encode_query()`.
+    """
+
+
+    def __init__(self, hub_connection: HubConnection, location: str = DEFAULT_LOCATION, **kwargs):
+        """
+        :param hub_connection: the hub to serve
+        :param location: the URI to listen on, e.g., 'grpc://127.0.0.1:8815'. NB: there is no authentication, so
+            servers should only listen on localhost or trusted networks
+        :param kwargs: passed to `pyarrow.flight.FlightServerBase`
+        """
+        super().__init__(location, **kwargs)
+        self.hub_connection = hub_connection
+        self._dataset = hub_connection.get_dataset()
+
+
+    def list_flights(self, context, criteria):
+        descriptor = flight.FlightDescriptor.for_path(FLIGHT_PATH)
+        yield self._flight_info(descriptor, encode_query(None, None))
+
+
+    def get_flight_info(self, context, descriptor):
+        return self._flight_info(descriptor, descriptor.command or encode_query(None, None))
+
+
+    def get_schema(self, context, descriptor):
+        return flight.SchemaResult(self.hub_connection.schema)
+
+
+    def do_get(self, context, ticket):
+        columns, filter = decode_query(ticket.ticket, self.hub_connection.schema)
+        scanner = self._dataset.scanner(columns=columns, filter=filter,
+                                        **scan_kwargs_for_profile(self.hub_connection.scan_profile))
+        return flight.RecordBatchStream(scanner.to_reader())
+
+
+    def _flight_info(self, descriptor: flight.FlightDescriptor, query: bytes) -> flight.FlightInfo:
+        schema = self.hub_connection.schema
+        columns, _ = decode_query(query, schema)
+        if columns is not None:
+            schema = pa.schema([schema.field(col_name) for col_name in columns])
+        return flight.FlightInfo(schema, descriptor, [flight.FlightEndpoint(query, [])], -1, -1)
+
+
+class HubFlightClient:
+    """
+    A client for `HubFlightServer`. Its `to_table()` and `to_reader()` methods mirror `HubConnection.to_table()` for
+    the `columns` and `filter` arguments, except that filters are passed as JSON-compatible filter specs (see
+    `filter_from_spec()`) rather than `pyarrow.compute.Expression`s.
+    """
+
+
+    def __init__(self, location: str = DEFAULT_LOCATION, **kwargs):
+        """
+        :param location: the server's URI as passed to `HubFlightServer`
+        :param kwargs: passed to `pyarrow.flight.connect()`
+        """
+        self._client = flight.connect(location, **kwargs)
+        self.schema = self._client.get_schema(flight.FlightDescriptor.for_path(FLIGHT_PATH)).schema
+
+
+    def to_reader(self, columns: list[str] | None = None, filter: dict | None = None) -> flight.FlightStreamReader:
+        """
+        :param columns: optional list of column names to return. None returns all columns
+        :param filter: optional filter spec limiting the returned rows, e.g.,
+            `{'column': 'location', 'op': '==', 'value': 'Bronx'}`. see `filter_from_spec()`
+        :return: a reader that streams the matching record batches from the server
+        :raise: pyarrow.ArrowInvalid (a ValueError) if the server rejects the query, e.g., because `filter` is invalid
+        """
+        return self._client.do_get(flight.Ticket(encode_query(columns, filter)))
+
+
+    def to_table(self, columns: list[str] | None = None, filter: dict | None = None) -> pa.Table:
+        """
+        :return: a `pyarrow.Table` of the matching rows. args are as documented in `to_reader()`
+        """
+        return self.to_reader(columns, filter).read_all()
+
+
+    def close(self):
+        self._client.close()
+
+
+def encode_query(columns: list[str] | None, filter: dict | None) -> bytes:
+    """
+    :param columns: as passed to `HubFlightClient.to_reader()`
+    :param filter: ""
+    :return: a query encoded as documented in `HubFlightServer`
+    """
+    return json.dumps({'columns': columns, 'filter': filter}).encode()
+
+
+def decode_query(query: bytes, schema: pa.Schema) -> tuple[list[str] | None, pc.Expression | None]:
+    """
+    :param query: as returned by `encode_query()`
+    :param schema: the schema that the query's filter is applied to, e.g., `HubConnection.schema`
+    :return: a 2-tuple: (columns, filter), where filter is built from the query's filter spec via `filter_from_spec()`
+    :raise: ValueError if `query` is invalid
+    """
+    try:
+        query = json.loads(query)
+        columns = query['columns']
+        if (columns is not None) and not (isinstance(columns, list)
+                                          and all(col_name in schema.names for col_name in columns)):
+            raise ValueError(f'invalid columns: {columns!r}')
+
+        return columns, filter_from_spec(query['filter'], schema) if query['filter'] is not None else None
+    except Exception as ex:
+        raise ValueError(f'invalid query: {ex}')
+
+
+def filter_from_spec(spec: dict, schema: pa.Schema) -> pc.Expression:
+    """
+    Builds a filter from a JSON-compatible filter spec, which is one of:
+
+    - a condition: `{'column': <name>, 'op': <op>, 'value': <value>}`, where op is one of `FILTER_OPS`. 'value' is a
+      list for 'in', and is omitted for 'is_null' and 'is_valid'. values are cast to the column's type in `schema`, so
+      dates are passed as ISO strings, e.g., `'2025-01-25'`
+    - a combination: `{'and': [<spec>, ...]}`, `{'or': [<spec>, ...]}`, or `{'not': <spec>}`
+
+    :param spec: a filter spec as above
+    :param schema: the schema that the filter is applied to, e.g., `HubConnection.schema`
+    :return: the equivalent `pyarrow.compute.Expression`
+    :raise: ValueError if `spec` is invalid
+    """
+    if not isinstance(spec, dict):
+        raise ValueError(f'invalid filter spec: {spec!r}')
+
+    if set(spec) in ({'and'}, {'or'}):
+        sub_specs = spec['and'] if 'and' in spec else spec['or']
+        if not (isinstance(sub_specs, list) and sub_specs):
+            raise ValueError(f'invalid filter spec: {spec!r}')
+
+        expressions = [filter_from_spec(sub_spec, schema) for sub_spec in sub_specs]
+        return functools.reduce(operator.and_ if 'and' in spec else operator.or_, expressions)
+    elif set(spec) == {'not'}:
+        return ~filter_from_spec(spec['not'], schema)
+
+    col_name, op = spec.get('column'), spec.get('op')
+    if col_name not in schema.names:
+        raise ValueError(f'invalid filter column: {col_name!r}')
+
+    field, pa_type = pc.field(col_name), schema.field(col_name).type
+    if (op in ('is_null', 'is_valid')) and (set(spec) == {'column', 'op'}):
+        return field.is_null() if op == 'is_null' else field.is_valid()
+    elif (op == 'in') and (set(spec) == {'column', 'op', 'value'}) and isinstance(spec['value'], list):
+        return field.isin(pa.array(spec['value']).cast(pa_type))
+    elif (op in _COMPARISON_OPS) and (set(spec) == {'column', 'op', 'value'}):
+        return _COMPARISON_OPS[op](field, pa.scalar(spec['value']).cast(pa_type))
+    else:
+        raise ValueError(f'invalid filter spec: {spec!r}')
@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+# the schema of `create_inventory()`'s per-file rows, before aggregation
+_FILE_SCHEMA = pa.schema([('model_id', pa.string()), ('round_id', pa.string()), ('file_format', pa.string()),
+                          ('num_bytes', pa.int64()), ('num_rows', pa.int64()),
+                          ('last_modified', pa.timestamp('us', tz='UTC'))])
+
+
+def create_inventory(hub_ds: ds.Dataset, filesystem: fs.FileSystem, model_output_dir: str,
+                     max_workers: int | None = None) -> pa.Table:
+    """
+    Creates an inventory of the model output files in `hub_ds`, with one row per model and round. File info (size and
+    modification time) comes from a single recursive listing of `model_output_dir` rather than a request per file. Row
+    counts are gathered concurrently for all files across a thread pool. They come from file metadata (e.g., parquet
+    footers) where possible, but csv files must be parsed to count their rows.
+
+    :param hub_ds: a model output dataset as returned by `HubConnection.get_dataset()`
+    :param filesystem: the pyarrow FileSystem that `hub_ds`'s files are in
+    :param model_output_dir: the directory in `filesystem` that contains `hub_ds`'s files
+    :param max_workers: maximum number of files to count rows for concurrently. None uses `ThreadPoolExecutor`'s
+        default
+    :return: a `pyarrow.Table` sorted by `model_id` and `round_id` with these columns:
+        - `model_id`: from the file's partition fields, e.g., its directory
+        - `round_id`: from the file's name per the standard `<round_id>-<model_id>.<ext>` naming convention. null for
+          files not following it
+        - `file_formats`: list of the distinct formats of the model's files for the round, e.g., `['csv']`
+        - `num_files`, `num_bytes`, `num_rows`: totals for the model's files for the round
+        - `last_modified`: the most recent modification time of the model's files for the round, e.g., for monitoring
+          submissions
+    """
+    filesystem_datasets = hub_ds.children if isinstance(hub_ds, ds.UnionDataset) else [hub_ds]
+    fragments = [fragment for filesystem_dataset in filesystem_datasets
+                 for fragment in filesystem_dataset.get_fragments()]
+    path_to_file_info = {file_info.path: file_info for file_info in filesystem.get_file_info(
+        fs.FileSelector(model_output_dir, allow_not_found=True, recursive=True))}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        num_rows = list(executor.map(lambda fragment: fragment.count_rows(), fragments))
+    file_rows = [_file_row(fragment, path_to_file_info[fragment.path], fragment_num_rows)
+                 for fragment, fragment_num_rows in zip(fragments, num_rows)]
+
+    file_table = pa.Table.from_pylist(file_rows, schema=_FILE_SCHEMA)
+    inventory = file_table.group_by(['model_id', 'round_id'], use_threads=False) \
+        .aggregate([('file_format', 'distinct'), ('file_format', 'count'), ('num_bytes', 'sum'), ('num_rows', 'sum'),
+                    ('last_modified', 'max')])
+    inventory = pa.table({'model_id': inventory['model_id'],
+                          'round_id': inventory['round_id'],
+                          'file_formats': inventory['file_format_distinct'],
+                          'num_files': inventory['file_format_count'],
+                          'num_bytes': inventory['num_bytes_sum'],
+                          'num_rows': inventory['num_rows_sum'],
+                          'last_modified': inventory['last_modified_max']})
+    return inventory.sort_by([('model_id', 'ascending'), ('round_id', 'ascending')])
+
+
+def _file_row(fragment: ds.FileFragment, file_info: fs.FileInfo, num_rows: int) -> dict:
+    model_id = ds.get_partition_keys(fragment.partition_expression).get('model_id')
+    file_stem = file_info.base_name.removesuffix(f'.{file_info.extension}')
+    round_id = file_stem.removesuffix(f'-{model_id}') if model_id and file_stem.endswith(f'-{model_id}') else None
+    return {'model_id': model_id, 'round_id': round_id, 'file_format': fragment.format.default_extname,
+            'num_bytes': file_info.size, 'num_rows': num_rows, 'last_modified': file_info.mtime}
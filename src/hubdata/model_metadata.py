@@ -0,0 +1,62 @@
+import pyarrow as pa
+import pyarrow.compute as pc
+import yaml
+from pyarrow import fs
+
+
+def read_model_metadata(filesystem: fs.FileSystem, model_metadata_dir: str) -> pa.Table:
+    """
+    Reads all model metadata files (`*.yml` or `*.yaml`) in `model_metadata_dir` into a `pyarrow.Table` with one row
+    per model, sorted by `model_id`. The `model_id` column is taken from each file's name (sans extension) as specified
+    at https://docs.hubverse.io/en/latest/user-guide/model-metadata.html . Only scalar-valued fields (strings, numbers,
+    and booleans) are kept as columns - nested fields like `model_contributors` are dropped. Fields that are missing
+    from some files are null for those models.
+
+    :param filesystem: a pyarrow FileSystem as created by `HubConnection`
+    :param model_metadata_dir: path to the hub's model metadata directory in `filesystem`
+    :return: a `pyarrow.Table` whose first column is `model_id`. it has no rows if `model_metadata_dir` does not exist
+    """
+    file_infos = filesystem.get_file_info(fs.FileSelector(model_metadata_dir, allow_not_found=True))
+    rows = []
+    for file_info in sorted(file_infos, key=lambda _: _.base_name):
+        if (file_info.type != fs.FileType.File) or (file_info.extension not in ['yml', 'yaml']):
+            continue
+
+        with filesystem.open_input_stream(file_info.path) as metadata_fp:
+            metadata = yaml.safe_load(metadata_fp.read())
+        if not isinstance(metadata, dict):
+            continue  # empty or invalid file
+
+        model_id = file_info.base_name[:-(len(file_info.extension) + 1)]
+        rows.append({'model_id': model_id} | {key: value for key, value in metadata.items()
+                                              if isinstance(value, (str, bool, int, float)) and key != 'model_id'})
+
+    # build the schema from the union of all fields (in order of first appearance), letting arrow infer each type. a
+    # field whose values have mixed types (e.g., a bool in one file and a str in another) falls back to string
+    col_names = list(dict.fromkeys(col_name for row in rows for col_name in row))
+    columns = {}
+    for col_name in col_names:
+        values = [row.get(col_name) for row in rows]
+        try:
+            columns[col_name] = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            columns[col_name] = pa.array([None if value is None else str(value) for value in values], pa.string())
+    if not columns:
+        return pa.table({'model_id': pa.array([], pa.string())})
+
+    return pa.table(columns)
+
+
+def model_ids_for_filter(model_metadata: pa.Table, model_filter: pc.Expression) -> list[str]:
+    """
+    :param model_metadata: a `pyarrow.Table` as returned by `read_model_metadata()`
+    :param model_filter: a `pyarrow.compute.Expression` over `model_metadata`'s columns, e.g.,
+        `pc.field('designated_model') == True`. rows for which the expression is null (e.g., because a model's metadata
+        file does not contain the field) are treated as not matching
+    :return: sorted list of `model_id`s whose metadata matches `model_filter`
+    :raise: ValueError if `model_filter` references a field not in `model_metadata`
+    """
+    try:
+        return sorted(model_metadata.filter(model_filter)['model_id'].to_pylist())
+    except pa.ArrowInvalid as ex:
+        raise ValueError(f'invalid model_filter: {ex}')
@@ -0,0 +1,139 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# non-task-id columns in model output tables
+_OUTPUT_COLUMNS = ('output_type', 'output_type_id', 'value')
+
+# the output types that `convert_samples()` can create
+SAMPLE_CONVERSION_OUTPUT_TYPES = ('quantile', 'mean', 'median')
+
+# the quantile levels that `convert_samples()` creates by default. these are the 23 levels used by many hubs
+DEFAULT_QUANTILE_LEVELS = (0.01, 0.025, 0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.35, 0.4, 0.45, 0.5, 0.55, 0.6, 0.65, 0.7,
+                           0.75, 0.8, 0.85, 0.9, 0.95, 0.975, 0.99)
+
+
+def quantile_matrix(forecasts: pa.Table) -> tuple[pa.Table, np.ndarray, np.ndarray]:
+    """
+    Pivots long-format quantile forecasts into a dense (forecast unit x quantile level) matrix, where a "unit" is a
+    unique combination of `model_id` and the task-id columns. The pivot is done with vectorized arrow and numpy
+    operations: each key column is dense-ranked, the rank vectors are uniqued together to number the units, and values
+    are then scattered into the matrix by (unit, level) index.
+
+    :param forecasts: model output rows, e.g., as returned by `HubConnection.to_table()`. rows whose `output_type` is
+        not 'quantile' (or whose `output_type_id` is null) are ignored. `output_type_id` can be numeric or string
+    :return: a 3-tuple: (keys, levels, values) where keys is a `pyarrow.Table` of the units' key columns (one row per
+        unit, sorted by unit with nulls last), levels is a sorted float64 array of the quantile levels found in
+        `forecasts`, and values is a float64 array of shape `(keys.num_rows, len(levels))` with `values[i, j]` being
+        unit i's value for quantile `levels[j]`. missing and null values are NaN
+    :raise: ValueError if `forecasts` has more than one row for the same unit and quantile level
+    """
+    key_columns = [col_name for col_name in forecasts.column_names if col_name not in _OUTPUT_COLUMNS]
+    forecasts = forecasts.filter((pc.field('output_type') == 'quantile') & pc.is_valid(pc.field('output_type_id')))
+    if forecasts.num_rows == 0:
+        return forecasts.select(key_columns), np.empty(0), np.empty((0, 0))
+
+    first_indices, unit_indices = _unit_indices(forecasts, key_columns)
+
+    # number the levels
+    taus = pc.cast(forecasts['output_type_id'], pa.float64()).to_numpy(zero_copy_only=False)
+    levels = np.unique(taus)
+    level_indices = np.searchsorted(levels, taus)
+
+    cell_indices = unit_indices * len(levels) + level_indices
+    if len(np.unique(cell_indices)) != len(cell_indices):
+        raise ValueError('forecasts has duplicate rows for the same unit and quantile level')
+
+    values = np.full(len(first_indices) * len(levels), np.nan)
+    values[cell_indices] = pc.cast(forecasts['value'], pa.float64()).to_numpy(zero_copy_only=False)
+    keys = forecasts.select(key_columns).take(pa.array(first_indices))
+    return keys, levels, values.reshape(len(first_indices), len(levels))
+
+
+def convert_samples(samples: pa.Table, output_types: tuple[str, ...] = SAMPLE_CONVERSION_OUTPUT_TYPES,
+                    quantile_levels: tuple[float, ...] = DEFAULT_QUANTILE_LEVELS) -> pa.Table:
+    """
+    Summarizes sample forecasts into other output types. Each forecast "unit" (a unique combination of `model_id` and
+    the task-id columns) gets one row per quantile level for 'quantile', and one row each for 'mean' and 'median'. This
+    is done with vectorized arrow and numpy operations over all units at once: rows are sorted by unit and value, after
+    which each unit's quantiles are computed from its sorted values via index arithmetic, i.e., there is no per-unit
+    python code. Quantiles use linear interpolation between the closest samples, as with `numpy.quantile()`'s default
+    method, so a unit's 'median' equals its 0.5 'quantile'.
+
+    :param samples: model output rows, e.g., as returned by `HubConnection.to_table()`. rows whose `output_type` is not
+        'sample' or whose `value` is null are ignored. samples of the same unit can have any `output_type_id`s
+    :param output_types: the output types to create: any of `SAMPLE_CONVERSION_OUTPUT_TYPES`
+    :param quantile_levels: the quantile levels to create for 'quantile'
+    :return: a `pyarrow.Table` with the same columns as `samples`, with rows ordered by `output_types`, then unit, then
+        quantile level. `output_type_id` is the quantile level for 'quantile' (cast to the `output_type_id` column's
+        type if it's a float or string type, and float64 otherwise, e.g., for integer sample ids) and null otherwise.
+        `value` is float64
+    :raise: ValueError if `output_types` or `quantile_levels` is invalid
+    """
+    invalid_output_types = [output_type for output_type in output_types
+                            if output_type not in SAMPLE_CONVERSION_OUTPUT_TYPES]
+    if invalid_output_types:
+        raise ValueError(f'invalid output_types: {invalid_output_types}. must be in {SAMPLE_CONVERSION_OUTPUT_TYPES}')
+    if not all(0 <= quantile_level <= 1 for quantile_level in quantile_levels):
+        raise ValueError(f'invalid quantile_levels: {quantile_levels}. must be between 0 and 1')
+
+    key_columns = [col_name for col_name in samples.column_names if col_name not in _OUTPUT_COLUMNS]
+    schema = samples.schema.set(samples.schema.get_field_index('value'), pa.field('value', pa.float64()))
+    output_type_id_type = schema.field('output_type_id').type
+    if ('quantile' in output_types) and not (pa.types.is_floating(output_type_id_type)
+                                             or pa.types.is_string(output_type_id_type)
+                                             or pa.types.is_large_string(output_type_id_type)):
+        # quantile levels can't be stored in other types, e.g., the integer sample ids of samples-only hubs
+        schema = schema.set(schema.get_field_index('output_type_id'), pa.field('output_type_id', pa.float64()))
+    samples = samples.filter((pc.field('output_type') == 'sample') & pc.is_valid(pc.field('value')))
+    if samples.num_rows == 0:
+        return schema.empty_table()
+
+    # sort values by unit and then value, and locate each unit's run of values
+    first_indices, unit_indices = _unit_indices(samples, key_columns)
+    values = pc.cast(samples['value'], pa.float64()).to_numpy(zero_copy_only=False)
+    sorted_values = values[np.lexsort((values, unit_indices))]
+    counts = np.bincount(unit_indices, minlength=len(first_indices))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    keys = samples.select(key_columns).take(pa.array(first_indices))
+
+    tables = []
+    for output_type in output_types:
+        if output_type == 'mean':
+            tables.append(_output_rows(keys, schema, 'mean', None, np.add.reduceat(sorted_values, starts) / counts))
+        else:
+            levels = np.array(quantile_levels if output_type == 'quantile' else [0.5], dtype=np.float64)
+            positions = (counts[:, np.newaxis] - 1) * levels  # shape: (num units, num levels)
+            lower_offsets = np.floor(positions).astype(np.int64)
+            upper_offsets = np.minimum(lower_offsets + 1, counts[:, np.newaxis] - 1)
+            lower_values = sorted_values[starts[:, np.newaxis] + lower_offsets]
+            upper_values = sorted_values[starts[:, np.newaxis] + upper_offsets]
+            unit_values = lower_values + (positions - lower_offsets) * (upper_values - lower_values)
+            tables.append(_output_rows(keys, schema, output_type, levels if output_type == 'quantile' else None,
+                                       unit_values.reshape(-1)))
+    return pa.concat_tables(tables)
+
+
+def _unit_indices(table: pa.Table, key_columns: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    # numbers the units in `table`, returning a 2-tuple: (first_indices, unit_indices), where first_indices has the
+    # index of each unit's first row (in unit order) and unit_indices has each row's unit number. units are ordered by
+    # their key columns' values. NB: ranks are 1-based, with nulls ranked last
+    ranks = np.column_stack([pc.rank(table[col_name].combine_chunks(), tiebreaker='dense').to_numpy()
+                             for col_name in key_columns]) if key_columns else np.zeros((table.num_rows, 1))
+    _, first_indices, unit_indices = np.unique(ranks, axis=0, return_index=True, return_inverse=True)
+    return first_indices, unit_indices.reshape(-1)  # NB: some numpy versions return a 2D inverse when `axis` is passed
+
+
+def _output_rows(keys: pa.Table, schema: pa.Schema, output_type: str, levels: np.ndarray | None,
+                 unit_values: np.ndarray) -> pa.Table:
+    # returns a table with `schema` whose rows are each of `keys`' rows repeated once per level (or once if `levels` is
+    # None), with the corresponding `unit_values`
+    num_levels = len(levels) if levels is not None else 1
+    repeated_keys = keys.take(pa.array(np.repeat(np.arange(keys.num_rows), num_levels)))
+    output_type_id_type = schema.field('output_type_id').type
+    columns = {col_name: repeated_keys[col_name] for col_name in keys.column_names}
+    columns['output_type'] = pa.array([output_type] * len(unit_values), schema.field('output_type').type)
+    columns['output_type_id'] = pa.array(np.tile(levels, keys.num_rows)).cast(output_type_id_type) \
+        if levels is not None else pa.nulls(len(unit_values), output_type_id_type)
+    columns['value'] = pa.array(unit_values)
+    return pa.table([columns[col_name] for col_name in schema.names], schema=schema)
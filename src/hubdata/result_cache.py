@@ -0,0 +1,180 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import pyarrow as pa
+from pyarrow import fs
+
+
+class ResultCache:
+    """
+    A thread-safe cache of query results (`pyarrow.Table`s) for `HubConnection.to_table()`, keyed by strings (see
+    `cache_key()`). Results are kept in memory up to `max_bytes` total, evicting the least recently used ones first.
+    If `cache_dir` is passed then results are also written there as Arrow IPC files so that they survive evictions
+    and restarts, and can be shared by processes. Disk files are memory-mapped when read and are evicted the same way,
+    by `max_disk_bytes`.
+
+    A cache can be shared by multiple `HubConnection`s: keys include the hub's location, and also a version of its
+    model output files so that results are invalidated when files are added, removed, or changed.
+    """
+
+
+    def __init__(self, max_bytes: int = 256 * 1024 ** 2, cache_dir: str | Path | None = None,
+                 max_disk_bytes: int | None = None):
+        """
+        :param max_bytes: maximum total size of in-memory results, as reported by `pyarrow.Table.nbytes`. results
+            larger than this aren't kept in memory
+        :param cache_dir: optional local directory to also store results in. created if necessary
+        :param max_disk_bytes: maximum total size of the files in `cache_dir`. None means no limit
+        :raise: ValueError if `max_bytes` or `max_disk_bytes` is invalid
+        """
+        if max_bytes < 0:
+            raise ValueError(f'invalid max_bytes: {max_bytes}')
+        if (max_disk_bytes is not None) and (max_disk_bytes < 0):
+            raise ValueError(f'invalid max_disk_bytes: {max_disk_bytes}')
+
+        self.max_bytes = max_bytes
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.max_disk_bytes = max_disk_bytes
+        self.nbytes = 0  # total size of in-memory results
+        self._tables: OrderedDict[str, pa.Table] = OrderedDict()  # least recently used first
+        self._lock = threading.Lock()
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+
+    def __getstate__(self):
+        # NB: pickled caches (e.g., passed to worker processes) start out with no in-memory results, and so they share
+        # only `cache_dir`'s
+        state = self.__dict__.copy()
+        state['_tables'] = OrderedDict()
+        state['nbytes'] = 0
+        del state['_lock']  # locks can't be pickled
+        return state
+
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+    def get(self, key: str) -> pa.Table | None:
+        """
+        :param key: as returned by `cache_key()`
+        :return: the cached result for `key`, or None if not cached
+        """
+        with self._lock:
+            if key in self._tables:
+                self._tables.move_to_end(key)
+                return self._tables[key]
+
+        if self.cache_dir is None:
+            return None
+
+        try:
+            table = pa.ipc.open_file(pa.memory_map(str(self._file_path(key)))).read_all()
+        except (FileNotFoundError, pa.ArrowInvalid):  # missing, or partially written by another process
+            return None
+
+        try:
+            os.utime(self._file_path(key))  # mark as recently used for disk eviction
+        except FileNotFoundError:  # evicted by another thread or process since we read it
+            pass
+        self._put_in_memory(key, table)
+        return table
+
+
+    def put(self, key: str, table: pa.Table):
+        """
+        Caches `table` under `key`, evicting older results as needed.
+
+        :param key: as returned by `cache_key()`
+        :param table: the result to cache
+        """
+        self._put_in_memory(key, table)
+        if self.cache_dir is None:
+            return
+
+        # write to a temporary file first so that readers never see a partial file
+        file_path = self._file_path(key)
+        temp_path = file_path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        with pa.OSFile(str(temp_path), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(temp_path, file_path)
+        if self.max_disk_bytes is not None:
+            self._evict_disk()
+
+
+    def clear(self):
+        """
+        Removes all cached results, including any in `cache_dir`.
+        """
+        with self._lock:
+            self._tables.clear()
+            self.nbytes = 0
+            if self.cache_dir is not None:
+                for file_path in self.cache_dir.glob('*.arrow'):
+                    file_path.unlink(missing_ok=True)
+
+
+    def _put_in_memory(self, key: str, table: pa.Table):
+        with self._lock:
+            if key in self._tables:
+                self.nbytes -= self._tables.pop(key).nbytes
+            if table.nbytes > self.max_bytes:
+                return
+
+            self._tables[key] = table
+            self.nbytes += table.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted_table = self._tables.popitem(last=False)
+                self.nbytes -= evicted_table.nbytes
+
+
+    def _evict_disk(self):
+        with self._lock:
+            file_stats = []
+            for file_path in self.cache_dir.glob('*.arrow'):
+                try:
+                    file_stats.append((file_path, file_path.stat()))
+                except FileNotFoundError:  # removed by another process
+                    continue
+            total_bytes = sum(stat.st_size for _, stat in file_stats)
+            for file_path, stat in sorted(file_stats, key=lambda file_stat: file_stat[1].st_mtime_ns):
+                if total_bytes <= self.max_disk_bytes:
+                    break
+
+                file_path.unlink(missing_ok=True)
+                total_bytes -= stat.st_size
+
+
+    def _file_path(self, key: str) -> Path:
+        return self.cache_dir / f'{hashlib.sha256(key.encode()).hexdigest()}.arrow'
+
+
+def cache_key(*parts) -> str:
+    """
+    :param parts: values that determine a query's result, e.g., the hub location, file set version, and `to_table()`
+        arguments. they must be picklable
+    :return: a key for `ResultCache`: a digest of `parts`' pickled form. NB: we don't use `repr()` because it's lossy
+        for some values, e.g., pyarrow abbreviates long arrays in `pyarrow.compute.Expression`s with '...'
+    """
+    return hashlib.sha256(pickle.dumps(parts)).hexdigest()
+
+
+def file_set_version(filesystem: fs.FileSystem, dir_path: str) -> str:
+    """
+    :param filesystem: a pyarrow FileSystem
+    :param dir_path: a directory in `filesystem`
+    :return: a digest of the paths, sizes, and modification times of all files under `dir_path`, which changes when
+        files are added, removed, or modified
+    """
+    file_infos = filesystem.get_file_info(fs.FileSelector(dir_path, allow_not_found=True, recursive=True))
+    hasher = hashlib.sha256()
+    for file_info in sorted(file_infos, key=lambda file_info: file_info.path):
+        if file_info.type == fs.FileType.File:
+            hasher.update(f'{file_info.path}\0{file_info.size}\0{file_info.mtime_ns}\n'.encode())
+    return hasher.hexdigest()
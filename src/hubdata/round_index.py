@@ -0,0 +1,135 @@
+import math
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# the maximum number of value combinations that `plan_round_ids()` will enumerate for a single model task. filters that
+# reference many columns with long value lists are not planned (i.e., all rounds are kept) beyond this
+MAX_PLAN_COMBINATIONS = 1_000_000
+
+
+def create_round_index(tasks: dict, schema: pa.Schema) -> list[dict]:
+    """
+    Builds an index of a hub's rounds from its `tasks.json` contents, recording which task-id values and output types
+    are valid in which round.
+
+    :param tasks: a hub's `tasks.json` contents - see `HubConnection.tasks`
+    :param schema: the hub's schema - see `HubConnection.schema`. used to type the indexed values
+    :return: a list with one dict per round, in `tasks['rounds']` order, with these keys:
+        - 'round_id_column': the task-id column holding the round id if `round_id_from_variable` is true, or None
+        - 'round_ids': list of the round's round id strings. these are the values that model output file names start
+          with, i.e., the round id column's values, or the round's literal `round_id`
+        - 'model_tasks': a list with one dict per model task, with keys:
+            - 'task_ids': dict mapping each task-id column in `schema` to a pa.Array of its valid values, typed per
+              `schema`. a column that the model task doesn't have, or whose required and optional values are both null,
+              is a single null, which is what its files contain
+            - 'output_types': pa.Array of the model task's output type names
+    """
+    round_index = []
+    task_id_col_names = _task_id_col_names(tasks)
+    for the_round in tasks['rounds']:
+        round_id_column = the_round['round_id'] if the_round.get('round_id_from_variable') else None
+        round_ids = {}  # a dict to remove duplicates while preserving order
+        model_tasks = []
+        for model_task in the_round['model_tasks']:
+            task_ids = {}
+            for col_name in task_id_col_names:
+                # NB: a task id that's missing, or whose required and optional values are both null, is NA in the
+                # model task's files
+                task_id = model_task['task_ids'].get(col_name)
+                values = ((task_id.get('required') or []) + (task_id.get('optional') or [])) if task_id else []
+                task_ids[col_name] = _pa_array_for_values(values or [None], schema.field(col_name).type)
+            model_tasks.append({'task_ids': task_ids,
+                                'output_types': pa.array(list(model_task['output_type']), pa.string())})
+            if round_id_column:
+                round_id_task_id = model_task['task_ids'].get(round_id_column, {})
+                for value in (round_id_task_id.get('required') or []) + (round_id_task_id.get('optional') or []):
+                    round_ids[str(value)] = None
+        if not round_id_column:
+            round_ids[the_round['round_id']] = None
+        round_index.append({'round_id_column': round_id_column, 'round_ids': list(round_ids),
+                            'model_tasks': model_tasks})
+    return round_index
+
+
+def plan_round_ids(round_index: list[dict], filter: pc.Expression, schema: pa.Schema) -> list[str] | None:
+    """
+    Determines which rounds can possibly contain rows matching `filter`. For each model task in each round, `filter` is
+    evaluated against every combination of the valid values of the columns it references. A round (or, for rounds whose
+    round id comes from a variable, a round id value) is kept if any combination matches.
+
+    Only filters that reference just task-id and `output_type` columns can be planned. Filters referencing any other
+    column (e.g., `model_id`, `output_type_id`, or `value`) keep all rounds, as do model tasks with too many value
+    combinations (see `MAX_PLAN_COMBINATIONS`).
+
+    :param round_index: as returned by `create_round_index()`
+    :param filter: a `pyarrow.compute.Expression` as passed to `pyarrow.dataset.Dataset.to_table()`
+    :param schema: the hub's schema - see `HubConnection.schema`
+    :return: list of round id strings that can match `filter`, or None if all rounds must be kept
+    """
+    plannable_col_names = set(round_index[0]['model_tasks'][0]['task_ids']) | {'output_type'} if round_index else set()
+    ref_col_names = referenced_col_names(filter, schema)
+    if (not ref_col_names) or (not ref_col_names <= plannable_col_names):
+        return None
+
+    planned_round_ids = {}  # a dict to remove duplicates while preserving order
+    for round_entry in round_index:
+        round_id_column = round_entry['round_id_column']
+        for model_task in round_entry['model_tasks']:
+            # always include the round id column so that we know which of the round's ids matched
+            col_names = sorted(ref_col_names | ({round_id_column} if round_id_column else set()))
+            col_values = [model_task['output_types'] if col_name == 'output_type' else model_task['task_ids'][col_name]
+                          for col_name in col_names]
+            if math.prod(len(values) for values in col_values) > MAX_PLAN_COMBINATIONS:
+                return None
+
+            combinations = _cross_product(col_names, col_values, schema)
+            matches = combinations.filter(filter)
+            if round_id_column:
+                for round_id in pc.unique(matches[round_id_column]).to_pylist():
+                    planned_round_ids[str(round_id)] = None
+            elif matches.num_rows:
+                for round_id in round_entry['round_ids']:
+                    planned_round_ids[round_id] = None
+    return list(planned_round_ids)
+
+
+def referenced_col_names(filter: pc.Expression, schema: pa.Schema) -> set[str]:
+    """
+    :return: the names of the columns in `schema` that `filter` references. found by checking which columns, when
+        removed from an empty table, cause `filter` to fail to bind
+    """
+    empty_table = schema.empty_table()
+    ref_col_names = set()
+    for col_name in schema.names:
+        try:
+            empty_table.drop_columns([col_name]).filter(filter)
+        except (pa.ArrowInvalid, KeyError):
+            ref_col_names.add(col_name)
+    return ref_col_names
+
+
+def _task_id_col_names(tasks: dict) -> list[str]:
+    col_names = {}  # a dict to remove duplicates while preserving order
+    for the_round in tasks['rounds']:
+        for model_task in the_round['model_tasks']:
+            for col_name in model_task['task_ids']:
+                col_names[col_name] = None
+    return list(col_names)
+
+
+def _pa_array_for_values(values: list, pa_type: pa.DataType) -> pa.Array:
+    # NB: 'NA' and None both mean null. values are converted to str first when the column is a string so that mixed
+    # value types (e.g., 1 and 'US') are allowed
+    values = [None if (value is None) or (value == 'NA') else value for value in values]
+    if pa_type == pa.string():
+        return pa.array([None if value is None else str(value) for value in values], pa.string())
+    return pa.array(values).cast(pa_type)
+
+
+def _cross_product(col_names: list[str], col_values: list[pa.Array], schema: pa.Schema) -> pa.Table:
+    # build the cross product by taking from each column's values with the corresponding row of an index grid
+    indices = np.indices([len(values) for values in col_values]).reshape(len(col_values), -1)
+    return pa.table({col_name: values.take(pa.array(indices[idx])).cast(schema.field(col_name).type)
+                     for idx, (col_name, values) in enumerate(zip(col_names, col_values))})
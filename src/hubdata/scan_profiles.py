@@ -0,0 +1,30 @@
+# Named sets of default keyword arguments for `pyarrow.dataset.Dataset.to_table()` (and `to_batches()`, `scanner()`)
+# used by `HubConnection`.
+#
+# 'local' keeps pyarrow's defaults, which suit low-latency disks. 'cloud' targets object stores like S3, where each
+# request has a high time-to-first-byte: more files and batches are read ahead so that many requests are in flight.
+# Hubs typically have many small files (one per model and round), so file read-ahead is what matters. See
+# `docs/source/dev.md` for benchmark results. (Parquet options like range coalescing `cache_options` showed no gain in
+# those benchmarks, and `pre_buffer` is already pyarrow's default, so neither is set.)
+SCAN_PROFILES = {
+    'local': {},
+    'cloud': {'fragment_readahead': 16, 'batch_readahead': 32},
+}
+
+
+def validate_scan_profile(scan_profile: str):
+    """
+    :param scan_profile: a key in `SCAN_PROFILES`, or 'auto'
+    :raise: ValueError if `scan_profile` is invalid
+    """
+    if (scan_profile != 'auto') and (scan_profile not in SCAN_PROFILES):
+        raise ValueError(f"invalid scan_profile: {scan_profile!r}. must be 'auto' or one of {list(SCAN_PROFILES)}")
+
+
+def scan_kwargs_for_profile(scan_profile: str, **kwargs) -> dict:
+    """
+    :param scan_profile: a key in `SCAN_PROFILES`
+    :param kwargs: caller-passed `Dataset.to_table()` keyword arguments, which take precedence over the profile's
+    :return: the merged keyword arguments
+    """
+    return SCAN_PROFILES[scan_profile] | kwargs
@@ -0,0 +1,96 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# non-task-id columns in model output and oracle output tables
+_OUTPUT_COLUMNS = ('output_type', 'output_type_id', 'value')
+_ORACLE_VALUE_COLUMN = 'oracle_value'
+
+
+def score_quantiles(forecasts: pa.Table, oracle_output: pa.Table, interval_levels: tuple[int, ...] = (50, 90)) \
+        -> pa.Table:
+    """
+    Scores quantile forecasts against observed values. Each forecast "unit" (a unique combination of `model_id` and the
+    task-id columns) gets these scores:
+
+    - `wis`: weighted interval score, computed as the mean over the unit's quantile levels of twice the quantile
+      (pinball) loss. this equals the interval-based WIS when the levels are symmetric and include the median
+    - `ae_median`: absolute error of the 0.5 quantile. null if the unit has no median
+    - `interval_coverage_<level>` (one per `interval_levels`): whether the observed value falls within the central
+      `<level>`% interval. null if the unit is missing either of the interval's quantiles
+
+    All scores are computed with vectorized arrow and numpy kernels over the joined rows followed by a single group by,
+    i.e., there is no per-unit python code.
+
+    :param forecasts: model output rows, e.g., as returned by `HubConnection.to_table()`. rows whose `output_type` is
+        not 'quantile' are ignored. `output_type_id` can be numeric or string
+    :param oracle_output: observed values with a subset of the forecasts' task-id columns and an `oracle_value`
+        column, e.g., as returned by `HubConnection.get_target_data()`. if it has `output_type` and `output_type_id`
+        columns then only rows with null or 'quantile' `output_type` are used
+    :param interval_levels: central interval levels (percentages) to compute coverage for
+    :return: a `pyarrow.Table` with one row per forecast unit that has an observation, sorted by unit
+    :raise: ValueError if `oracle_output` has no `oracle_value` column or no columns in common with `forecasts`
+    """
+    if _ORACLE_VALUE_COLUMN not in oracle_output.column_names:
+        raise ValueError(f'oracle_output has no {_ORACLE_VALUE_COLUMN!r} column')
+
+    unit_columns = [col_name for col_name in forecasts.column_names if col_name not in _OUTPUT_COLUMNS]
+    join_keys = [col_name for col_name in oracle_output.column_names if col_name in unit_columns]
+    if not join_keys:
+        raise ValueError('oracle_output has no task-id columns in common with forecasts')
+
+    # prepare the oracle: only point observations, one per join key combination
+    if 'output_type' in oracle_output.column_names:
+        oracle_output = oracle_output.filter(pc.is_null(pc.field('output_type'))
+                                             | (pc.field('output_type') == 'quantile'))
+    oracle_output = (oracle_output.select(join_keys + [_ORACLE_VALUE_COLUMN])
+                     .group_by(join_keys).aggregate([(_ORACLE_VALUE_COLUMN, 'first')])
+                     .rename_columns(join_keys + [_ORACLE_VALUE_COLUMN]))
+    oracle_output = oracle_output.set_column(oracle_output.column_names.index(_ORACLE_VALUE_COLUMN),
+                                             _ORACLE_VALUE_COLUMN,
+                                             pc.cast(oracle_output[_ORACLE_VALUE_COLUMN], pa.float64()))
+
+    # prepare the forecasts: only quantile rows with non-null values, with a numeric `output_type_id`
+    forecasts = forecasts.filter((pc.field('output_type') == 'quantile') & pc.is_valid(pc.field('value')))
+    forecasts = forecasts.set_column(forecasts.column_names.index('output_type_id'), 'output_type_id',
+                                     pc.cast(forecasts['output_type_id'], pa.float64()))
+
+    # join and compute per-row score contributions
+    joined = (forecasts.select(unit_columns + ['output_type_id', 'value'])
+              .join(oracle_output, keys=join_keys, join_type='inner')
+              .filter(pc.is_valid(pc.field(_ORACLE_VALUE_COLUMN))))
+    tau = joined['output_type_id'].to_numpy()
+    q = pc.cast(joined['value'], pa.float64()).to_numpy()
+    y = joined[_ORACLE_VALUE_COLUMN].to_numpy()
+
+    is_median = np.isclose(tau, 0.5)
+    contributions = {
+        'wis': pa.array(2 * ((y <= q) - tau) * (q - y)),
+        'ae_median': pa.array(np.abs(y - q), mask=~is_median),
+    }
+    for interval_level in interval_levels:
+        is_lower = np.isclose(tau, (1 - interval_level / 100) / 2)
+        is_upper = np.isclose(tau, (1 + interval_level / 100) / 2)
+        contributions[f'interval_coverage_{interval_level}'] = pa.array(np.where(is_lower, y >= q, y <= q),
+                                                                        mask=~(is_lower | is_upper))
+
+    # aggregate by unit. coverage needs both the lower and upper rows to be present, so we also count them
+    contributions_table = joined.select(unit_columns)
+    for col_name, contribution in contributions.items():
+        contributions_table = contributions_table.append_column(col_name, contribution)
+    aggregations = [('wis', 'mean'), ('ae_median', 'mean')]
+    for interval_level in interval_levels:
+        aggregations.append((f'interval_coverage_{interval_level}', 'all'))
+        aggregations.append((f'interval_coverage_{interval_level}', 'count'))
+    scores = contributions_table.group_by(unit_columns, use_threads=False).aggregate(aggregations)
+
+    # clean up: coverage with missing interval rows -> null, rename aggregate columns, and order by unit
+    columns = {col_name: scores[col_name] for col_name in unit_columns}
+    columns['wis'] = scores['wis_mean']
+    columns['ae_median'] = scores['ae_median_mean']
+    for interval_level in interval_levels:
+        col_name = f'interval_coverage_{interval_level}'
+        columns[col_name] = pc.if_else(pc.equal(scores[f'{col_name}_count'], 2), scores[f'{col_name}_all'],
+                                       pa.scalar(None, pa.bool_()))
+    return pa.table(columns).sort_by([(col_name, 'ascending') for col_name in unit_columns])
+
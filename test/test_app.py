@@ -0,0 +1,40 @@
+import json
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+from click.testing import CliRunner
+
+from hubdata.app import cli
+
+
+def test_export(tmp_path):
+    hub_path = str(Path('test/hubs/simple').absolute())
+    runner = CliRunner()
+    result = runner.invoke(cli, ['export', hub_path, str(tmp_path / 'out'), '--format', 'csv', '--filter',
+                                 'age_group=65+', '--filter', 'origin_date=2022-10-15', '--partition-by', 'model_id'])
+    assert result.exit_code == 0
+    assert 'exported to' in result.output
+    assert ds.dataset(tmp_path / 'out', format='csv', partitioning='hive').count_rows() == 276
+
+    # invalid filters
+    for filter in ['foo=1', 'horizon', 'horizon=x']:
+        result = runner.invoke(cli, ['export', hub_path, str(tmp_path / 'out2'), '--filter', filter])
+        assert 'invalid filter' in result.output
+        assert not (tmp_path / 'out2').exists()
+
+
+def test_inventory(tmp_path):
+    hub_path = str(Path('test/hubs/simple').absolute())
+    runner = CliRunner()
+    result = runner.invoke(cli, ['inventory', hub_path])
+    assert result.exit_code == 0
+    rows = [json.loads(line) for line in result.output.splitlines()]
+    assert [(row['model_id'], row['round_id'], row['num_rows']) for row in rows] == [
+        ('hub-baseline', '2022-10-01', 24), ('hub-baseline', '2022-10-08', 276), ('hub-baseline', '2022-10-15', 276),
+        ('team1-goodmodel', '2022-10-08', 23)]
+
+    result = runner.invoke(cli, ['inventory', hub_path, '--format', 'arrow', '--output', str(tmp_path / 'inv.arrows')])
+    assert result.exit_code == 0
+    with pa.ipc.open_stream(pa.OSFile(str(tmp_path / 'inv.arrows'))) as reader:
+        assert reader.read_all()['num_rows'].to_pylist() == [24, 276, 276, 23]
@@ -6,8 +6,11 @@ from pathlib import Path
 import pyarrow as pa
 import pyarrow.compute as pc
 import pytest
+from pyarrow import fs
 
 from hubdata import connect_hub, create_hub_schema
+from hubdata.inventory import create_inventory
+from hubdata.scan_profiles import scan_kwargs_for_profile
 
 
 def test_hub_path_existence():
@@ -17,6 +20,12 @@ def test_hub_path_existence():
         connect_hub(Path('test/hubs/example-complex-forecast-hub') / 'nonexistent-dir')
 
 
+def test_invalid_hub_path():
+    for hub_path in ['relative/path', 'foo://bar', '']:
+        with pytest.raises(RuntimeError, match='invalid hub_path'):
+            connect_hub(hub_path)
+
+
 def test_hub_fields():
     hub_path = Path('test/hubs/example-complex-scenario-hub')
     hub_connection = connect_hub(hub_path)  # default schema
@@ -156,3 +165,337 @@ def test_get_dataset_returned_class():
     assert isinstance(hub_ds, pa.dataset.UnionDataset)
     assert len(hub_ds.children) == 2
     assert all([isinstance(child, pa.dataset.FileSystemDataset) for child in hub_ds.children])
+
+
+def test_model_metadata():
+    hub_connection = connect_hub(Path('test/hubs/flu-metrocast'))
+    model_metadata = hub_connection.model_metadata
+    assert isinstance(model_metadata, pa.Table)
+    assert model_metadata['model_id'].to_pylist() == ['epiENGAGE-baseline', 'epiENGAGE-ensemble_mean']
+    assert model_metadata['designated_model'].to_pylist() == [True, True]
+    assert 'model_contributors' not in model_metadata.column_names  # nested fields are dropped
+    assert hub_connection.model_metadata is model_metadata  # cached
+
+    # case: field missing in some files -> null
+    hub_connection = connect_hub(Path('test/hubs/example-complex-forecast-hub'))
+    assert hub_connection.model_metadata['model_id'].to_pylist() == ['Flusight-baseline', 'MOBS-GLEAM_FLUH', 'PSI-DICE']
+    assert hub_connection.model_metadata['citation'].null_count == 1
+    assert hub_connection.model_ids(pc.field('citation') != '') == ['MOBS-GLEAM_FLUH', 'PSI-DICE']
+
+    # case: no model-metadata dir
+    hub_connection = connect_hub(Path('test/hubs/covid19-forecast-hub'))
+    assert hub_connection.model_metadata.column_names == ['model_id']
+    assert hub_connection.model_metadata.num_rows == 0
+
+
+def test_model_filter():
+    hub_connection = connect_hub(Path('test/hubs/flu-metrocast'))
+    model_filter = pc.field('ensemble_of_hub_models') == True
+    assert hub_connection.model_ids(model_filter) == ['epiENGAGE-ensemble_mean']
+
+    # only the matching model's directory is discovered
+    hub_ds = hub_connection.get_dataset(model_filter=model_filter)
+    assert len(hub_ds.files) == 13
+    assert all(['/epiENGAGE-ensemble_mean/' in file for file in hub_ds.files])
+    pa_table = hub_connection.to_table(model_filter=model_filter)
+    assert pc.unique(pa_table['model_id']).to_pylist() == ['epiENGAGE-ensemble_mean']
+    assert pa_table.num_rows == 6210
+    assert pa_table.schema == hub_connection.schema
+
+    # case: mix of csv and parquet
+    hub_connection = connect_hub(Path('test/hubs/simple'))
+    pa_table = hub_connection.to_table(model_filter=pc.field('include_ensemble') == False)
+    assert pc.unique(pa_table['model_id']).to_pylist() == ['hub-baseline']
+    assert pa_table.num_rows == hub_connection.to_table(filter=pc.field('model_id') == 'hub-baseline').num_rows
+
+    # case: invalid field
+    with pytest.raises(ValueError, match='invalid model_filter'):
+        hub_connection.get_dataset(model_filter=pc.field('nonexistent') == 1)
+
+
+def test_round_pruning():
+    hub_connection = connect_hub(Path('test/hubs/simple'))
+
+    # only files from rounds that can match the filter are discovered
+    hub_ds = hub_connection.get_dataset(filter=pc.field('age_group') == '65+')
+    assert [Path(file).name for file in hub_ds.files] == ['2022-10-15-hub-baseline.parquet']
+    filter = pc.field('origin_date') == datetime.date(2022, 10, 8)
+    hub_ds = hub_connection.get_dataset(filter=filter)
+    assert sorted(Path(file).name for file in hub_ds.files) == ['2022-10-08-hub-baseline.csv',
+                                                                '2022-10-08-team1-goodmodel.csv']
+
+    # pruned scans return the same rows as unpruned ones
+    for filter in [pc.field('age_group') == '65+', pc.field('origin_date') == datetime.date(2022, 10, 8),
+                   pc.field('output_type') == 'sample']:
+        pruned_table = hub_connection.to_table(filter=filter)
+        assert pruned_table.schema == hub_connection.schema
+        assert pruned_table.sort_by('value').equals(hub_connection.get_dataset().to_table(filter=filter)
+                                                    .sort_by('value'))
+
+    # case: unplannable filter -> all files
+    hub_ds = hub_connection.get_dataset(filter=pc.field('model_id') == 'hub-baseline')
+    assert sum(len(child.files) for child in hub_ds.children) == 4
+
+
+def test_selective_discovery():
+    hub_connection = connect_hub(Path('test/hubs/simple'))
+
+    # only the requested models' directories and rounds' files are discovered
+    hub_ds = hub_connection.get_dataset(model_ids=['team1-goodmodel'])
+    assert [Path(file).name for file in hub_ds.files] == ['2022-10-08-team1-goodmodel.csv']
+    hub_ds = hub_connection.get_dataset(round_ids=['2022-10-08', '2022-10-15'])
+    assert sorted(Path(file).name for child in hub_ds.children for file in child.files) == \
+           ['2022-10-08-hub-baseline.csv', '2022-10-08-team1-goodmodel.csv', '2022-10-15-hub-baseline.parquet']
+    hub_ds = hub_connection.get_dataset(model_ids=['hub-baseline'], round_ids=['2022-10-08'])
+    assert [Path(file).name for file in hub_ds.files] == ['2022-10-08-hub-baseline.csv']
+
+    # limits are combined with model_filter and filter
+    hub_ds = hub_connection.get_dataset(model_filter=pc.field('include_ensemble') == True,
+                                        model_ids=['hub-baseline', 'team1-goodmodel'])
+    assert [Path(file).name for file in hub_ds.files] == ['2022-10-08-team1-goodmodel.csv']
+    hub_ds = hub_connection.get_dataset(filter=pc.field('age_group') == '65+', round_ids=['2022-10-08'])
+    assert len(hub_ds.files) == 0
+    assert hub_ds.schema == hub_connection.schema
+
+    # selective scans return the same rows as filtered ones
+    filter = (pc.field('model_id') == 'hub-baseline') & (pc.field('origin_date') == datetime.date(2022, 10, 8))
+    assert hub_connection.to_table(model_ids=['hub-baseline'], round_ids=['2022-10-08']).sort_by('value') \
+        .equals(hub_connection.to_table(filter=filter).sort_by('value'))
+
+    # case: unknown models and rounds -> empty
+    assert hub_connection.to_table(model_ids=['no-such-model']).num_rows == 0
+    assert hub_connection.to_table(round_ids=['1999-01-01']).num_rows == 0
+
+
+def test_export(tmp_path):
+    hub_connection = connect_hub(Path('test/hubs/simple'))
+    filter = pc.field('age_group') == '65+'
+    expected_table = hub_connection.to_table(columns=['model_id', 'origin_date', 'value'], filter=filter)
+
+    # parquet, partitioned
+    hub_connection.export(tmp_path / 'parquet', columns=['model_id', 'origin_date', 'value'], filter=filter,
+                          partition_by=['model_id'])
+    assert [path.name for path in (tmp_path / 'parquet').iterdir()] == ['model_id=hub-baseline']
+    exported_table = pa.dataset.dataset(tmp_path / 'parquet', partitioning='hive').to_table() \
+        .select(['model_id', 'origin_date', 'value'])
+    assert exported_table.num_rows == expected_table.num_rows
+    assert exported_table.sort_by('value')['value'].equals(expected_table.sort_by('value')['value'])
+
+    # partition columns not in `columns` are added to them
+    hub_connection.export(tmp_path / 'partition-only', columns=['value'], filter=filter, partition_by=['model_id'])
+    assert [path.name for path in (tmp_path / 'partition-only').iterdir()] == ['model_id=hub-baseline']
+    exported_table = pa.dataset.dataset(tmp_path / 'partition-only', partitioning='hive').to_table()
+    assert exported_table.column_names == ['value', 'model_id']
+    assert exported_table.num_rows == expected_table.num_rows
+
+    with pytest.raises(ValueError, match='invalid partition_by'):
+        hub_connection.export(tmp_path / 'bad-partition', partition_by=['no-such-column'])
+
+    # csv and arrow, split into files
+    for file_format in ['csv', 'arrow']:
+        hub_connection.export(tmp_path / file_format, format=file_format, max_rows_per_file=100)
+        exported_ds = pa.dataset.dataset(tmp_path / file_format, format=file_format)
+        assert len(exported_ds.files) > 1
+        assert exported_ds.count_rows() == hub_connection.get_dataset().count_rows()
+
+    # existing data
+    with pytest.raises(pa.ArrowInvalid, match='not empty'):
+        hub_connection.export(tmp_path / 'csv', format='csv')
+    hub_connection.export(tmp_path / 'csv', format='csv', existing_data_behavior='delete_matching')
+    assert len(pa.dataset.dataset(tmp_path / 'csv', format='csv').files) == 1
+
+    with pytest.raises(ValueError, match='invalid format'):
+        hub_connection.export(tmp_path / 'json', format='json')
+
+
+def test_inventory():
+    hub_connection = connect_hub(Path('test/hubs/simple'))
+    inventory = hub_connection.inventory()
+    assert inventory.column_names == ['model_id', 'round_id', 'file_formats', 'num_files', 'num_bytes', 'num_rows',
+                                      'last_modified']
+    assert inventory.select(['model_id', 'round_id', 'file_formats', 'num_files', 'num_rows']).to_pylist() == [
+        {'model_id': 'hub-baseline', 'round_id': '2022-10-01', 'file_formats': ['csv'], 'num_files': 1, 'num_rows': 24},
+        {'model_id': 'hub-baseline', 'round_id': '2022-10-08', 'file_formats': ['csv'], 'num_files': 1,
+         'num_rows': 276},
+        {'model_id': 'hub-baseline', 'round_id': '2022-10-15', 'file_formats': ['parquet'], 'num_files': 1,
+         'num_rows': 276},
+        {'model_id': 'team1-goodmodel', 'round_id': '2022-10-08', 'file_formats': ['csv'], 'num_files': 1,
+         'num_rows': 23},
+    ]
+    assert pc.sum(inventory['num_rows']).as_py() == hub_connection.get_dataset().count_rows()
+    assert inventory['num_bytes'].to_pylist() == [
+        (Path(hub_connection.model_output_dir) / model_id / f'{round_id}-{model_id}.{file_formats[0]}').stat().st_size
+        for model_id, round_id, file_formats in zip(inventory['model_id'].to_pylist(),
+                                                    inventory['round_id'].to_pylist(),
+                                                    inventory['file_formats'].to_pylist())]
+    assert inventory['last_modified'].null_count == 0
+
+    # file info comes from one listing of the model output directory rather than a request per file
+    get_file_info_args = []
+
+
+    class RecordingFileSystem:
+        def get_file_info(self, paths_or_selector):
+            get_file_info_args.append(paths_or_selector)
+            return hub_connection._filesystem.get_file_info(paths_or_selector)
+
+
+    assert create_inventory(hub_connection.get_dataset(), RecordingFileSystem(), hub_connection.model_output_dir) \
+           == inventory
+    assert len(get_file_info_args) == 1
+    assert isinstance(get_file_info_args[0], fs.FileSelector) and get_file_info_args[0].recursive
+
+
+def _write_partitioned_hub(tmp_path, partitioning, partitioning_flavor):
+    """
+    Helper that copies the flu-metrocast hub to `tmp_path`, rewriting its model output as parquet files partitioned by
+    `partitioning`.
+    """
+    pa_table = connect_hub(Path('test/hubs/flu-metrocast')).to_table()
+    shutil.copytree('test/hubs/flu-metrocast/hub-config', tmp_path / 'hub-config')
+    shutil.copytree('test/hubs/flu-metrocast/model-metadata', tmp_path / 'model-metadata')
+    admin_json_path = tmp_path / 'hub-config' / 'admin.json'
+    with open(admin_json_path) as admin_fp:
+        admin_dict = json.load(admin_fp)
+        admin_dict['file_format'] = ['parquet']
+    with open(admin_json_path, 'w') as admin_fp:
+        json.dump(admin_dict, admin_fp)
+    pa.dataset.write_dataset(pa_table, tmp_path / 'model-output', format='parquet', partitioning=partitioning,
+                             partitioning_flavor=partitioning_flavor)
+    return pa_table
+
+
+def test_partitioning_hive(tmp_path):
+    exp_table = _write_partitioned_hub(tmp_path, ['model_id', 'reference_date'], 'hive')
+    hub_connection = connect_hub(tmp_path)  # auto-detected
+    assert hub_connection.partitioning == 'hive'
+    assert hub_connection.partitions == (('model_id', pa.string()), ('reference_date', pa.date32()))
+    assert hub_connection.schema == create_hub_schema(hub_connection.tasks, partitions=hub_connection.partitions)
+    assert hub_connection.schema.field('reference_date').type == pa.date32()
+
+    act_table = hub_connection.to_table()
+    assert act_table.num_rows == exp_table.num_rows
+    assert act_table.select(exp_table.column_names).sort_by('value') == exp_table.sort_by('value')
+
+    # partition fields are used for pruning
+    hub_ds = hub_connection.get_dataset()
+    assert len(hub_ds.files) == 31
+    assert len(list(hub_ds.get_fragments(filter=pc.field('reference_date') == datetime.date(2025, 1, 25)))) == 1
+
+    # model_filter lists only the `model_id=...` directories of matching models
+    hub_ds = hub_connection.get_dataset(model_filter=pc.field('ensemble_of_hub_models') == True)
+    assert len(hub_ds.files) == 13
+    assert pc.unique(hub_ds.to_table()['model_id']).to_pylist() == ['epiENGAGE-ensemble_mean']
+
+    # model_ids and round_ids are applied via directories and partition-pruning filters, respectively
+    hub_ds = hub_connection.get_dataset(model_ids=['epiENGAGE-baseline'], round_ids=['2025-01-25'])
+    assert len(hub_ds.files) == 18
+    pa_table = hub_ds.to_table()
+    assert pc.unique(pa_table['model_id']).to_pylist() == ['epiENGAGE-baseline']
+    assert pc.unique(pa_table['reference_date']).to_pylist() == [datetime.date(2025, 1, 25)]
+
+    # explicit partitions
+    hub_connection = connect_hub(tmp_path, partitioning='hive',
+                                 partitions=(('model_id', pa.string()), ('reference_date', pa.string())))
+    assert hub_connection.schema.field('reference_date').type == pa.string()
+    assert hub_connection.to_table().num_rows == exp_table.num_rows
+
+
+def test_partitioning_directory_non_model_id(tmp_path):
+    # case: directory partitioning whose first level is not model_id, so model_filter falls back to filtering
+    exp_table = _write_partitioned_hub(tmp_path, ['target', 'model_id'], None)
+    hub_connection = connect_hub(tmp_path, partitioning='directory',
+                                 partitions=(('target', pa.string()), ('model_id', pa.string())))
+    assert hub_connection.to_table().num_rows == exp_table.num_rows
+    pa_table = hub_connection.to_table(model_filter=pc.field('ensemble_of_hub_models') == True)
+    assert pc.unique(pa_table['model_id']).to_pylist() == ['epiENGAGE-ensemble_mean']
+    assert pa_table.num_rows == 6210
+
+
+def test_partitioning_filename(tmp_path):
+    exp_table = _write_partitioned_hub(tmp_path, ['model_id'], 'filename')  # ex: 'epiENGAGE-baseline_part-0.parquet'
+    hub_connection = connect_hub(tmp_path, partitioning='filename', partitions=(('model_id', pa.string()),))
+    assert hub_connection.partitioning == 'filename'
+    assert hub_connection.to_table().num_rows == exp_table.num_rows
+    pa_table = hub_connection.to_table(model_filter=pc.field('ensemble_of_hub_models') == False)
+    assert pc.unique(pa_table['model_id']).to_pylist() == ['epiENGAGE-baseline']
+
+
+def test_partitioning_errors(tmp_path):
+    with pytest.raises(ValueError, match='invalid partitioning'):
+        connect_hub(Path('test/hubs/flu-metrocast'), partitioning='bad')
+    with pytest.raises(ValueError, match='no hive partitions found'):
+        connect_hub(Path('test/hubs/flu-metrocast'), partitioning='hive')
+    with pytest.raises(ValueError, match='partitions must be passed for filename partitioning'):
+        connect_hub(Path('test/hubs/flu-metrocast'), partitioning='filename')
+
+    # default for a standard hub
+    hub_connection = connect_hub(Path('test/hubs/flu-metrocast'))
+    assert hub_connection.partitioning == 'directory'
+    assert hub_connection.partitions == (('model_id', pa.string()),)
+
+
+def test_map_rounds(tmp_path):
+    # case: standard layout with csv and parquet files: each round's table comes from only that round's files
+    hub_connection = connect_hub(Path('test/hubs/simple'))
+    filter = pc.field('location') == 'US'
+    round_tables = hub_connection._map_rounds(lambda table: table, filter, None, 4)
+    assert [pc.unique(table['origin_date']).to_pylist() for table in round_tables] == [
+        [datetime.date(2022, 10, 1)], [datetime.date(2022, 10, 8)], [datetime.date(2022, 10, 15)]]
+    assert sum(table.num_rows for table in round_tables) == hub_connection.to_table(filter=filter).num_rows
+
+    # case: model_filter
+    round_tables = hub_connection._map_rounds(lambda table: table, filter,
+                                              pc.field('model_id') == 'team1-goodmodel', None)
+    assert [pc.unique(table['model_id']).to_pylist() for table in round_tables] == [['team1-goodmodel']]
+
+    # case: non-standard layout: scanned once and split by round
+    exp_table = _write_partitioned_hub(tmp_path, ['model_id', 'reference_date'], 'hive')
+    hub_connection = connect_hub(tmp_path)
+    round_tables = hub_connection._map_rounds(lambda table: table, pc.field('output_type') == 'quantile', None, None)
+    assert all(len(pc.unique(table['reference_date'])) == 1 for table in round_tables if table.num_rows)
+    assert sum(table.num_rows for table in round_tables) == exp_table.num_rows
+
+
+def test_scan_profile():
+    hub_path = Path('test/hubs/simple')  # csv and parquet
+    assert connect_hub(hub_path).scan_profile == 'local'  # 'auto'
+    with pytest.raises(ValueError, match='invalid scan_profile'):
+        connect_hub(hub_path, scan_profile='bad')
+
+    # 'cloud' reads ahead, and gives the same data as 'local'
+    hub_connection = connect_hub(hub_path, scan_profile='cloud')
+    assert hub_connection.scan_profile == 'cloud'
+    assert scan_kwargs_for_profile('cloud')['fragment_readahead'] == 16
+    hub_ds = hub_connection.get_dataset()
+    sort_keys = [(col_name, 'ascending') for col_name in hub_connection.schema.names]
+    assert hub_connection.to_table().sort_by(sort_keys) == connect_hub(hub_path).to_table().sort_by(sort_keys)
+
+    # explicit kwargs override the profile's
+    assert hub_connection.to_table(fragment_readahead=1, batch_readahead=1).num_rows == hub_ds.count_rows()
+
+
+def test_memory_map(tmp_path):
+    # rewrite the simple hub's model output as Arrow IPC files
+    pa_table = connect_hub(Path('test/hubs/simple')).to_table()
+    shutil.copytree('test/hubs/simple/hub-config', tmp_path / 'hub-config')
+    for model_id in pc.unique(pa_table['model_id']).to_pylist():
+        (tmp_path / 'model-output' / model_id).mkdir(parents=True)
+        model_table = pa_table.filter(pc.field('model_id') == model_id).drop_columns(['model_id'])
+        with pa.ipc.new_file(tmp_path / 'model-output' / model_id / f'2022-10-08-{model_id}.arrow',
+                             model_table.schema) as writer:
+            writer.write_table(model_table)
+
+    hub_connection = connect_hub(tmp_path, memory_map=True)
+    assert hub_connection.memory_map
+    assert not connect_hub(tmp_path).memory_map
+
+    # same data, but read zero-copy: no buffers are allocated for the scanned columns
+    sort_keys = [(col_name, 'ascending') for col_name in hub_connection.schema.names]
+    assert hub_connection.to_table().sort_by(sort_keys) == connect_hub(tmp_path).to_table().sort_by(sort_keys)
+    allocated_bytes = pa.total_allocated_bytes()
+    value_table = hub_connection.to_table(columns=['output_type', 'value'])
+    assert pa.total_allocated_bytes() - allocated_bytes < value_table.nbytes
+
+    with pytest.raises(ValueError, match='memory_map is only supported for local hubs'):
+        connect_hub('mock:///', memory_map=True)
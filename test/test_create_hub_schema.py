@@ -15,7 +15,12 @@ from hubdata.create_hub_schema import _pa_type_for_req_and_opt_vals, _pa_type_si
                           (None, [-1, 0, 1, 2, 3], pa.int32()),
                           ([0.01, 0.025], None, pa.float64()),
                           ([0.25, 1], None, pa.float64()),
-                          (None, ['NA'], None)])
+                          (None, ['NA'], None),
+                          (['NA'], [0.5], pa.float64()),
+                          (None, ['0.5', '1'], pa.string()),
+                          (None, [True, False], pa.string()),
+                          (['2024-11-16', 1], None, pa.string()),
+                          ([f'2024-11-{day:02}' for day in range(1, 31)] * 10 + ['US'], None, pa.string())])
 def tests__pa_type_for_req_and_opt_vals(required, optional, exp_pa_type):
     assert _pa_type_for_req_and_opt_vals(required, optional) == exp_pa_type
 
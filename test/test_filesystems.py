@@ -0,0 +1,86 @@
+from pathlib import Path
+
+import pyarrow as pa
+import pytest
+from pyarrow import fs
+
+from hubdata import connect_hub
+from hubdata.filesystems import FilesystemOptionsError, clear_filesystem_registry, get_filesystem, set_io_thread_count
+
+
+@pytest.fixture(autouse=True)
+def clear_registry():
+    clear_filesystem_registry()
+    yield
+    clear_filesystem_registry()
+
+
+def test_get_filesystem_s3_shared():
+    # NB: passing region avoids the network call to resolve the bucket's region
+    options = {'region': 'us-east-1', 'anonymous': True}
+    filesystem1, path1 = get_filesystem('s3://example-complex-forecast-hub/', options)
+    filesystem2, path2 = get_filesystem('s3://example-complex-forecast-hub/sub-dir', options)
+    assert isinstance(filesystem1, fs.S3FileSystem)
+    assert filesystem1 is filesystem2  # same bucket and options -> shared
+    assert (path1, path2) == ('example-complex-forecast-hub', 'example-complex-forecast-hub/sub-dir')
+    assert filesystem1.region == 'us-east-1'
+
+    # different bucket or options -> different filesystem
+    assert get_filesystem('s3://other-bucket', options)[0] is not filesystem1
+    filesystem3, _ = get_filesystem('s3://example-complex-forecast-hub/',
+                                    options | {'request_timeout': 5, 'retry_max_attempts': 10})
+    assert filesystem3 is not filesystem1
+
+    # equivalent retry strategies -> shared
+    filesystem4, _ = get_filesystem('s3://example-complex-forecast-hub/',
+                                    options | {'retry_strategy': fs.AwsStandardS3RetryStrategy(max_attempts=3)})
+    assert get_filesystem('s3://example-complex-forecast-hub/',
+                          options | {'retry_strategy': fs.AwsStandardS3RetryStrategy(max_attempts=3)})[0] \
+           is filesystem4
+    assert get_filesystem('s3://example-complex-forecast-hub/', options | {'retry_max_attempts': 3})[0] is filesystem4
+    assert get_filesystem('s3://example-complex-forecast-hub/',
+                          options | {'retry_strategy': fs.AwsDefaultS3RetryStrategy(max_attempts=3)})[0] \
+           is not filesystem4
+
+    # options can't be combined with a query string, whose options would otherwise be dropped
+    with pytest.raises(FilesystemOptionsError, match='cannot be combined with a URI query string'):
+        get_filesystem('s3://example-complex-forecast-hub?endpoint_override=localhost:9000&scheme=http', options)
+    filesystem5, _ = get_filesystem('s3://example-complex-forecast-hub?region=us-east-1')
+    assert isinstance(filesystem5, fs.S3FileSystem) and (filesystem5.region == 'us-east-1')
+
+    # clearing the registry
+    clear_filesystem_registry()
+    assert get_filesystem('s3://example-complex-forecast-hub/', options)[0] is not filesystem1
+
+
+def test_get_filesystem_local():
+    filesystem, path = get_filesystem(Path('test/hubs/simple'))
+    assert isinstance(filesystem, fs.LocalFileSystem)
+    assert path == str(Path('test/hubs/simple').absolute())
+
+    filesystem, _ = get_filesystem(Path('test/hubs/simple'), {'use_mmap': True})
+    assert isinstance(filesystem, fs.LocalFileSystem)
+
+    with pytest.raises(ValueError, match='filesystem_options are not supported'):
+        get_filesystem('mock:///', {'anonymous': True})
+
+
+def test_connect_hub_filesystem_options():
+    hub_connection = connect_hub(Path('test/hubs/simple'), filesystem_options={'use_mmap': True})
+    assert hub_connection.to_table().num_rows == connect_hub(Path('test/hubs/simple')).to_table().num_rows
+
+    with pytest.raises(FilesystemOptionsError, match='filesystem_options are not supported'):
+        connect_hub('mock:///', filesystem_options={'anonymous': True})
+
+
+def test_set_io_thread_count():
+    orig_io_thread_count = pa.io_thread_count()
+    try:
+        set_io_thread_count(13)
+        assert pa.io_thread_count() == 13
+        connect_hub(Path('test/hubs/simple'), io_thread_count=7)
+        assert pa.io_thread_count() == 7
+        with pytest.raises(ValueError, match='invalid io_thread_count'):
+            set_io_thread_count(0)
+    finally:
+        pa.set_io_thread_count(orig_io_thread_count)
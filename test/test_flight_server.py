@@ -0,0 +1,96 @@
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.flight as flight
+import pytest
+
+from hubdata import connect_hub
+from hubdata.flight_server import HubFlightClient, HubFlightServer, decode_query, encode_query, filter_from_spec
+
+
+@pytest.fixture
+def hub_connection():
+    return connect_hub(Path('test/hubs/flu-metrocast'))
+
+
+@pytest.fixture
+def location(hub_connection):
+    server = HubFlightServer(hub_connection, 'grpc://127.0.0.1:0')  # port 0 -> any free port
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    yield f'grpc://127.0.0.1:{server.port}'
+    server.shutdown()
+
+
+def test_to_table(hub_connection, location):
+    client = HubFlightClient(location)
+    assert client.schema == hub_connection.schema
+
+    pa_table = client.to_table()
+    assert pa_table.schema == hub_connection.schema
+    assert pa_table.num_rows == 14895
+
+    pa_table = client.to_table(columns=['target_end_date', 'value'],
+                               filter={'column': 'location', 'op': '==', 'value': 'Bronx'})
+    expected_table = hub_connection.to_table(columns=['target_end_date', 'value'],
+                                             filter=pc.field('location') == 'Bronx')
+    assert pa_table.sort_by([('target_end_date', 'ascending'), ('value', 'ascending')]) \
+        .equals(expected_table.sort_by([('target_end_date', 'ascending'), ('value', 'ascending')]))
+    client.close()
+
+
+def test_concurrent_clients(location):
+    def count_rows(location_name):
+        client = HubFlightClient(location)
+        num_rows = client.to_table(filter={'column': 'location', 'op': '==', 'value': location_name}).num_rows
+        client.close()
+        return num_rows
+
+    location_names = ['Bronx', 'Brooklyn', 'Manhattan', 'Queens']
+    with ThreadPoolExecutor(max_workers=len(location_names)) as executor:
+        assert list(executor.map(count_rows, location_names)) == [1350] * len(location_names)
+
+
+def test_flight_info(location):
+    client = flight.connect(location)
+    flight_infos = list(client.list_flights())
+    assert len(flight_infos) == 1
+    assert client.do_get(flight_infos[0].endpoints[0].ticket).read_all().num_rows == 14895
+
+
+def test_query_encoding(hub_connection):
+    schema = hub_connection.schema
+    columns, filter = decode_query(encode_query(['value'], {'column': 'location', 'op': '==', 'value': 'Bronx'}),
+                                   schema)
+    assert columns == ['value']
+    assert filter.equals(pc.field('location') == 'Bronx')
+    assert decode_query(encode_query(None, None), schema) == (None, None)
+    for query in [b'junk', encode_query(['no-such-column'], None),
+                  encode_query(None, {'column': 'location', 'op': '~', 'value': 'Bronx'})]:
+        with pytest.raises(ValueError, match='invalid query'):
+            decode_query(query, schema)
+
+
+def test_filter_from_spec(hub_connection):
+    schema = hub_connection.schema
+    assert filter_from_spec({'column': 'reference_date', 'op': '>=', 'value': '2025-01-25'}, schema) \
+        .equals(pc.field('reference_date') >= pa.scalar(datetime.date(2025, 1, 25)))
+    assert filter_from_spec({'column': 'location', 'op': 'in', 'value': ['Bronx', 'Queens']}, schema) \
+        .equals(pc.field('location').isin(['Bronx', 'Queens']))
+    assert filter_from_spec({'not': {'column': 'output_type_id', 'op': 'is_null'}}, schema) \
+        .equals(~pc.field('output_type_id').is_null())
+    spec = {'and': [{'column': 'location', 'op': '==', 'value': 'Bronx'},
+                    {'or': [{'column': 'horizon', 'op': '<', 'value': 1}, {'column': 'value', 'op': '>', 'value': 2}]}]}
+    assert hub_connection.to_table(filter=filter_from_spec(spec, schema)).num_rows == \
+           hub_connection.to_table(filter=(pc.field('location') == 'Bronx')
+                                   & ((pc.field('horizon') < 1) | (pc.field('value') > 2))).num_rows
+
+    for spec in [None, {}, {'and': []}, {'column': 'no-such-column', 'op': '==', 'value': 1},
+                 {'column': 'location', 'op': 'in', 'value': 'Bronx'}, {'column': 'location', 'op': '=='},
+                 {'column': 'location', 'op': 'is_null', 'value': 1}]:
+        with pytest.raises(ValueError, match='invalid filter'):
+            filter_from_spec(spec, schema)
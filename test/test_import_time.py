@@ -0,0 +1,33 @@
+import subprocess
+import sys
+
+import pytest
+
+# modules that should not be imported until a command or API needs them. see `benchmarks/import_time.py` for timings
+HEAVY_MODULES = ['numpy', 'pyarrow', 'rich', 'structlog', 'yaml']
+
+
+@pytest.mark.parametrize('import_stmt', ['import hubdata', 'import hubdata.app'])
+def test_lightweight_import(import_stmt):
+    # NB: we use a subprocess because the test process has already imported everything
+    code = f'{import_stmt}; import sys; print(" ".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ''
+
+
+def test_lazy_attributes():
+    import hubdata
+    from hubdata.connect_hub import HubConnection, connect_hub
+
+    assert hubdata.connect_hub is connect_hub
+    assert hubdata.HubConnection is HubConnection
+    assert set(hubdata.__all__) <= set(dir(hubdata))
+    with pytest.raises(AttributeError, match='has no attribute'):
+        hubdata.nonexistent
+
+
+def test_cli_help():
+    result = subprocess.run([sys.executable, '-m', 'hubdata.app', '--help'], capture_output=True, text=True,
+                            check=True)
+    assert 'schema' in result.stdout
+    assert 'dataset' in result.stdout
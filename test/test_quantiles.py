@@ -0,0 +1,142 @@
+import datetime
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pytest
+
+from hubdata import connect_hub, convert_samples, quantile_matrix
+
+
+def test_quantile_matrix():
+    forecasts = pa.table({
+        'model_id': ['b', 'b', 'a', 'a', 'a', 'b', 'a'],
+        'location': ['US', 'US', 'US', None, None, 'US', 'US'],
+        'output_type': ['quantile', 'quantile', 'quantile', 'quantile', 'quantile', 'mean', 'quantile'],
+        'output_type_id': ['0.5', '0.25', '0.75', '0.25', '0.5', None, '0.5'],
+        'value': [2.0, 1.0, 7.0, 3.0, None, 9.0, 6.0],
+    })
+    keys, levels, values = quantile_matrix(forecasts)
+    assert keys.to_pydict() == {'model_id': ['a', 'a', 'b'], 'location': ['US', None, 'US']}
+    np.testing.assert_array_equal(levels, [0.25, 0.5, 0.75])
+    np.testing.assert_array_equal(values, [[np.nan, 6.0, 7.0],
+                                           [3.0, np.nan, np.nan],
+                                           [1.0, 2.0, np.nan]])
+
+    # case: no quantile rows
+    keys, levels, values = quantile_matrix(forecasts.filter(pc.field('output_type') == 'mean'))
+    assert keys.column_names == ['model_id', 'location']
+    assert keys.num_rows == 0
+    assert levels.shape == (0,)
+    assert values.shape == (0, 0)
+
+    # case: duplicate rows
+    with pytest.raises(ValueError, match='duplicate rows'):
+        quantile_matrix(pa.concat_tables([forecasts, forecasts]))
+
+
+def test_hub_quantile_matrix():
+    hub_connection = connect_hub(Path('test/hubs/flu-metrocast'))
+    keys, levels, values = hub_connection.quantile_matrix()
+    assert keys.column_names == ['reference_date', 'target', 'horizon', 'location', 'target_end_date', 'model_id']
+    np.testing.assert_array_equal(levels, [0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.975])
+    assert values.shape == (1655, 9)
+    assert not np.isnan(values).any()
+
+    # values match the long-format rows
+    pa_table = hub_connection.to_table(filter=pc.field('output_type') == 'quantile')
+    assert np.nansum(values) == pytest.approx(pc.sum(pa_table['value']).as_py())
+
+    # case: filter
+    keys, levels, values = hub_connection.quantile_matrix(filter=pc.field('location') == 'NYC')
+    assert pc.unique(keys['location']).to_pylist() == ['NYC']
+    assert values.shape == (keys.num_rows, 9)
+
+
+def test_convert_samples():
+    rng = np.random.default_rng(0)
+    values = {('a', 'US'): rng.normal(size=100), ('a', '01'): rng.normal(size=7), ('b', 'US'): rng.normal(size=1)}
+    samples = pa.table({
+        'model_id': [model_id for (model_id, _), unit_values in values.items() for _ in unit_values] + ['b'],
+        'location': [location for (_, location), unit_values in values.items() for _ in unit_values] + ['US'],
+        'output_type': ['sample'] * sum(len(unit_values) for unit_values in values.values()) + ['mean'],
+        'output_type_id': pa.array(range(109)).cast(pa.string()),
+        'value': np.concatenate(list(values.values()) + [[99.0]]),
+    })
+    converted = convert_samples(samples, quantile_levels=(0.1, 0.5, 0.9))
+    assert converted.schema == samples.schema
+    assert converted['output_type'].to_pylist() == ['quantile'] * 9 + ['mean'] * 3 + ['median'] * 3
+
+    quantiles = converted.filter(pc.field('output_type') == 'quantile')
+    assert list(zip(quantiles['model_id'].to_pylist(), quantiles['location'].to_pylist()))[::3] == \
+           [('a', '01'), ('a', 'US'), ('b', 'US')]  # sorted units
+    assert quantiles['output_type_id'].to_pylist() == ['0.1', '0.5', '0.9'] * 3
+    units = [('a', '01'), ('a', 'US'), ('b', 'US')]
+    assert quantiles['value'].to_pylist() == pytest.approx(
+        np.concatenate([np.quantile(values[unit], [0.1, 0.5, 0.9]) for unit in units]))
+
+    means = converted.filter(pc.field('output_type') == 'mean')
+    assert means['output_type_id'].null_count == 3
+    assert means['value'].to_pylist() == pytest.approx([np.mean(values[unit]) for unit in units])
+    medians = converted.filter(pc.field('output_type') == 'median')
+    assert medians['value'].to_pylist() == pytest.approx(quantiles['value'].to_pylist()[1::3])
+
+    # case: numeric output_type_id
+    converted = convert_samples(samples.set_column(3, 'output_type_id', pa.array(range(109), pa.float64())),
+                                output_types=('quantile',), quantile_levels=(0.25,))
+    assert converted['output_type_id'].to_pylist() == [0.25] * 3
+
+    # case: integer output_type_id (e.g., a samples-only hub's sample ids) -> promoted to float64
+    int_samples = samples.set_column(3, 'output_type_id', pa.array(range(109), pa.int32()))
+    converted = convert_samples(int_samples, quantile_levels=(0.01, 0.5))
+    assert converted.schema.field('output_type_id').type == pa.float64()
+    assert converted.filter(pc.field('output_type') == 'quantile')['output_type_id'].to_pylist() == [0.01, 0.5] * 3
+    assert convert_samples(int_samples.filter(pc.field('output_type') == 'mean')).schema == converted.schema
+    assert convert_samples(int_samples, output_types=('mean',)).schema == int_samples.schema.set(
+        4, pa.field('value', pa.float64()))
+
+    # case: no samples
+    assert convert_samples(samples.filter(pc.field('output_type') == 'mean')).num_rows == 0
+
+    with pytest.raises(ValueError, match='invalid output_types'):
+        convert_samples(samples, output_types=('pmf',))
+    with pytest.raises(ValueError, match='invalid quantile_levels'):
+        convert_samples(samples, quantile_levels=(50,))
+
+
+def test_hub_convert_samples(tmp_path):
+    shutil.copytree('test/hubs/example-complex-forecast-hub/hub-config', tmp_path / 'hub-config')
+    schema = connect_hub(tmp_path).schema
+    rng = np.random.default_rng(0)
+    for model_id in ['team1-model', 'team2-model']:
+        (tmp_path / 'model-output' / model_id).mkdir(parents=True)
+        for reference_date in [datetime.date(2022, 10, 22), datetime.date(2022, 10, 29)]:
+            num_rows = 2 * 50  # 2 locations x 50 samples
+            samples = pa.table({
+                'reference_date': [reference_date] * num_rows,
+                'target': ['wk inc flu hosp'] * num_rows,
+                'horizon': pa.array([0] * num_rows, pa.int32()),
+                'location': ['US'] * 50 + ['01'] * 50,
+                'target_end_date': [reference_date] * num_rows,
+                'output_type': ['sample'] * num_rows,
+                'output_type_id': [str(idx) for idx in range(num_rows)],
+                'value': rng.poisson(100, num_rows).astype(float),
+            }, schema=schema.remove(schema.get_field_index('model_id')))
+            pacsv.write_csv(samples, tmp_path / 'model-output' / model_id / f'{reference_date}-{model_id}.csv')
+
+    hub_connection = connect_hub(tmp_path)
+    converted = hub_connection.convert_samples(max_workers=4)
+    assert converted.num_rows == 2 * 2 * 2 * (23 + 2)  # models x rounds x locations x output type rows
+    assert converted.schema == hub_connection.schema
+
+    # streaming by round gives the same result (including row order) as converting everything at once
+    assert converted.equals(convert_samples(hub_connection.to_table()))
+    assert hub_connection.convert_samples(output_types=('median', 'quantile')) \
+        .equals(convert_samples(hub_connection.to_table(), output_types=('median', 'quantile')))
+
+    # filters
+    converted = hub_connection.convert_samples(filter=pc.field('location') == 'US', output_types=('mean',))
+    assert converted['location'].to_pylist() == ['US'] * 4
@@ -0,0 +1,106 @@
+import json
+import shutil
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pytest
+
+from hubdata import connect_hub
+from hubdata.result_cache import ResultCache, cache_key
+
+
+def test_result_cache_eviction():
+    table = pa.table({'x': pa.array(range(1000), pa.int64())})  # 8,000 bytes
+    result_cache = ResultCache(max_bytes=20_000)
+    result_cache.put('a', table)
+    result_cache.put('b', table)
+    assert result_cache.get('a') is table  # 'a' is now the most recently used
+    result_cache.put('c', table)
+    assert result_cache.nbytes == 16_000
+    assert result_cache.get('b') is None  # least recently used
+    assert result_cache.get('a') is table
+    assert result_cache.get('c') is table
+
+    # too large to cache
+    result_cache.put('d', pa.concat_tables([table] * 3))
+    assert result_cache.get('d') is None
+
+    result_cache.clear()
+    assert result_cache.get('a') is None
+    assert result_cache.nbytes == 0
+
+    with pytest.raises(ValueError, match='invalid max_bytes'):
+        ResultCache(max_bytes=-1)
+
+
+def test_result_cache_disk(tmp_path):
+    table = pa.table({'x': pa.array(range(1000), pa.int64())})
+    result_cache = ResultCache(max_bytes=0, cache_dir=tmp_path / 'cache', max_disk_bytes=20_000)
+    result_cache.put('a', table)
+    assert result_cache.nbytes == 0  # nothing in memory
+    assert result_cache.get('a').equals(table)
+
+    # a new cache (e.g., in another process) sees the files
+    assert ResultCache(cache_dir=tmp_path / 'cache').get('a').equals(table)
+
+    # disk eviction: each file is a bit larger than the table
+    result_cache.put('b', table)
+    result_cache.put('c', table)
+    assert len(list((tmp_path / 'cache').glob('*.arrow'))) == 2
+    assert result_cache.get('c').equals(table)
+
+    result_cache.clear()
+    assert list((tmp_path / 'cache').iterdir()) == []
+
+
+def test_hub_result_cache(tmp_path):
+    hub_path = tmp_path / 'simple'
+    shutil.copytree(Path('test/hubs/simple'), hub_path)
+    result_cache = ResultCache()
+    hub_connection = connect_hub(hub_path, result_cache=result_cache)
+    assert hub_connection.result_cache is result_cache
+
+    filter = pc.field('origin_date') == pc.scalar(pa.scalar('2022-10-08').cast(pa.date32()))
+    pa_table = hub_connection.to_table(filter=filter)
+    assert pa_table.num_rows == 299
+    assert hub_connection.to_table(filter=filter) is pa_table  # cached
+    assert hub_connection.to_table(filter=pc.field('origin_date') == pa.scalar('2022-10-08').cast(pa.date32())) \
+           is pa_table  # equivalent filter
+    assert hub_connection.to_table(columns=['value'], filter=filter) is not pa_table
+    assert connect_hub(hub_path, result_cache=result_cache).to_table(filter=filter) is pa_table  # shared cache
+
+    # changing the files invalidates results
+    shutil.copy(hub_path / 'model-output/team1-goodmodel/2022-10-08-team1-goodmodel.csv',
+                hub_path / 'model-output/team1-goodmodel/2022-10-08-team1-goodmodel-copy.csv')
+    new_table = hub_connection.to_table(filter=filter)
+    assert new_table is not pa_table
+    assert new_table.num_rows > pa_table.num_rows
+
+    # changing the config invalidates results too. here '2022-10-08' is no longer a round, so its files are pruned
+    tasks_json_path = hub_path / 'hub-config' / 'tasks.json'
+    with open(tasks_json_path) as tasks_fp:
+        tasks = json.load(tasks_fp)
+    tasks['rounds'][0]['model_tasks'][0]['task_ids']['origin_date']['optional'] = ['2022-10-01']
+    with open(tasks_json_path, 'w') as tasks_fp:
+        json.dump(tasks, tasks_fp)
+    assert connect_hub(hub_path, result_cache=result_cache).to_table(filter=filter).num_rows == 0
+
+
+def test_cache_key():
+    assert cache_key('a', pc.field('x') == 1) == cache_key('a', pc.field('x') == 1)
+    assert cache_key('a', pc.field('x') == 1) != cache_key('a', pc.field('x') == 2)
+
+    # long arrays, which expressions' reprs abbreviate with '...'
+    pad = [f'location-{idx}' for idx in range(30)]
+    assert cache_key(pc.field('location').isin(pad + ['Bronx'] + pad)) != \
+           cache_key(pc.field('location').isin(pad + ['Queens'] + pad))
+
+
+def test_hub_result_cache_long_isin():
+    hub_connection = connect_hub(Path('test/hubs/flu-metrocast'), result_cache=ResultCache())
+    pad = [f'location-{idx}' for idx in range(30)]
+    bronx_table = hub_connection.to_table(filter=pc.field('location').isin(pad + ['Bronx'] + pad))
+    queens_table = hub_connection.to_table(filter=pc.field('location').isin(pad + ['Queens'] + pad))
+    assert pc.unique(bronx_table['location']).to_pylist() == ['Bronx']
+    assert pc.unique(queens_table['location']).to_pylist() == ['Queens']
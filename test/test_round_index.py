@@ -0,0 +1,65 @@
+import datetime
+import shutil
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from hubdata import connect_hub
+from hubdata.round_index import plan_round_ids, referenced_col_names
+
+
+def test_round_index():
+    hub_connection = connect_hub(Path('test/hubs/simple'))
+    round_index = hub_connection.round_index
+    assert [round_entry['round_id_column'] for round_entry in round_index] == ['origin_date', 'origin_date']
+    assert [round_entry['round_ids'] for round_entry in round_index] == [['2022-10-01', '2022-10-08'],
+                                                                        ['2022-10-15', '2022-10-22', '2022-10-29']]
+    assert hub_connection.round_index is round_index  # cached
+
+
+def test_referenced_col_names():
+    schema = connect_hub(Path('test/hubs/simple')).schema
+    assert referenced_col_names((pc.field('age_group') == '65+') & (pc.field('value') > 1), schema) == \
+           {'age_group', 'value'}
+    assert referenced_col_names(pc.scalar(True), schema) == set()
+
+
+def test_plan_round_ids():
+    hub_connection = connect_hub(Path('test/hubs/simple'))
+
+    # task-id filters
+    assert hub_connection.round_ids(pc.field('age_group') == '65+') == ['2022-10-15', '2022-10-22', '2022-10-29']
+    assert hub_connection.round_ids(pc.field('origin_date') == datetime.date(2022, 10, 8)) == ['2022-10-08']
+    assert hub_connection.round_ids((pc.field('age_group') == '65+')
+                                    & (pc.field('origin_date') == datetime.date(2022, 10, 8))) == []
+
+    # output_type filters
+    assert hub_connection.round_ids(pc.field('output_type') == 'sample') == []
+
+    # unplannable filters
+    assert hub_connection.round_ids(pc.field('model_id') == 'hub-baseline') is None
+    assert hub_connection.round_ids((pc.field('age_group') == '65+') & (pc.field('value') > 1)) is None
+    assert plan_round_ids([], pc.field('age_group') == '65+', hub_connection.schema) is None
+
+
+def test_null_task_ids(tmp_path):
+    # FluSight's peak targets have no `horizon` or `target_end_date`, i.e., `{"required": null, "optional": null}`, so
+    # those columns are null in their files
+    shutil.copytree('test/hubs/FluSight-forecast-hub/hub-config', tmp_path / 'hub-config')
+    (tmp_path / 'model-output' / 'team1-model').mkdir(parents=True)
+    hub_connection = connect_hub(tmp_path)
+    schema = hub_connection.schema.remove(hub_connection.schema.get_field_index('model_id'))
+    peak_table = pa.Table.from_pylist([{'reference_date': datetime.date(2023, 10, 14), 'target': 'peak inc flu hosp',
+                                        'horizon': None, 'location': 'US', 'target_end_date': None,
+                                        'output_type': 'quantile', 'output_type_id': '0.5', 'value': 10.0}],
+                                      schema=schema)
+    pq.write_table(peak_table, tmp_path / 'model-output' / 'team1-model' / '2023-10-14-team1-model.parquet')
+
+    assert hub_connection.round_index[0]['model_tasks'][2]['task_ids']['horizon'].to_pylist() == [None]
+    filter = pc.field('horizon').is_null()
+    assert hub_connection.round_ids(filter) == hub_connection.round_index[0]['round_ids']
+    assert hub_connection.get_dataset().to_table(filter=filter).num_rows == 1
+    assert hub_connection.to_table(filter=filter).num_rows == 1
+    assert hub_connection.to_table(filter=pc.field('target') == 'peak inc flu hosp').num_rows == 1
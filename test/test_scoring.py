@@ -0,0 +1,69 @@
+import shutil
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pytest
+
+from hubdata import connect_hub, score_quantiles
+
+
+def test_score_quantiles():
+    forecasts = pa.table({'location': ['US'] * 3 + ['MA'] * 3 + ['CT'],
+                          'model_id': ['m1'] * 7,
+                          'output_type': ['quantile'] * 6 + ['mean'],
+                          'output_type_id': ['0.25', '0.5', '0.75'] * 2 + [None],
+                          'value': [1.0, 2.0, 3.0, 1.0, 2.0, 3.0, 5.0]})
+    oracle_output = pa.table({'location': ['US', 'MA', 'CT'], 'oracle_value': [2.5, 4.0, 5.0]})
+    scores = score_quantiles(forecasts, oracle_output, interval_levels=(50, 90))
+    assert scores.column_names == ['location', 'model_id', 'wis', 'ae_median', 'interval_coverage_50',
+                                   'interval_coverage_90']
+    assert scores['location'].to_pylist() == ['MA', 'US']  # sorted; 'CT' has no quantile rows
+
+    # US: 2 x pinball losses are 0.75, 0.5, 0.25 -> mean 0.5. MA: 1.5, 2.0, 1.5 -> mean 5/3
+    assert scores['wis'].to_pylist() == pytest.approx([5 / 3, 0.5])
+    assert scores['ae_median'].to_pylist() == pytest.approx([2.0, 0.5])
+    assert scores['interval_coverage_50'].to_pylist() == [False, True]
+    assert scores['interval_coverage_90'].to_pylist() == [None, None]  # no 0.05 or 0.95 quantiles
+
+
+def test_score_quantiles_errors():
+    forecasts = pa.table({'location': ['US'], 'output_type': ['quantile'], 'output_type_id': [0.5], 'value': [1.0]})
+    with pytest.raises(ValueError, match="no 'oracle_value' column"):
+        score_quantiles(forecasts, pa.table({'location': ['US'], 'observation': [1.0]}))
+    with pytest.raises(ValueError, match='no task-id columns in common'):
+        score_quantiles(forecasts, pa.table({'target': ['x'], 'oracle_value': [1.0]}))
+
+
+def test_hub_score_quantiles(tmp_path):
+    shutil.copytree('test/hubs/flu-metrocast/', tmp_path, dirs_exist_ok=True)
+    hub_connection = connect_hub(tmp_path)
+    with pytest.raises(RuntimeError, match='target data not found'):
+        hub_connection.get_target_data()
+
+    # create oracle output from the baseline model's horizon 0 medians so those absolute errors are all zero
+    medians = hub_connection.to_table(filter=(pc.field('model_id') == 'epiENGAGE-baseline')
+                                             & (pc.field('horizon') == 0) & (pc.field('output_type_id') == 0.5))
+    oracle_output = (medians.select(['location', 'target', 'target_end_date', 'value'])
+                     .group_by(['location', 'target', 'target_end_date']).aggregate([('value', 'first')])
+                     .rename_columns(['location', 'target', 'target_end_date', 'oracle_value']))
+    (tmp_path / 'target-data').mkdir()
+    pacsv.write_csv(oracle_output, tmp_path / 'target-data' / 'oracle-output.csv')
+    assert hub_connection.get_target_data().schema.field('target_end_date').type == pa.date32()
+
+    scores = hub_connection.score_quantiles(max_workers=4)
+    key_col_names = ['location', 'target', 'target_end_date']
+    obs_keys = set(zip(*[oracle_output[col_name].to_pylist() for col_name in key_col_names]))
+    score_keys = list(zip(*[scores[col_name].to_pylist() for col_name in key_col_names]))
+    assert 0 < len(score_keys) < 14895 // 9  # only forecast units with observations are scored
+    assert set(score_keys) == obs_keys
+    baseline_scores = scores.filter((pc.field('model_id') == 'epiENGAGE-baseline') & (pc.field('horizon') == 0))
+    assert pc.max(baseline_scores['ae_median']).as_py() == 0
+    assert pc.all(baseline_scores['interval_coverage_50']).as_py()
+
+    # streaming by round gives the same result as scoring everything at once
+    assert scores == score_quantiles(hub_connection.to_table(), oracle_output)
+
+    # user filter
+    scores = hub_connection.score_quantiles(filter=pc.field('location') == 'Bronx')
+    assert pc.unique(scores['location']).to_pylist() == ['Bronx']
@@ -0,0 +1,104 @@
+import importlib
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import pyarrow.compute as pc
+import pytest
+
+from hubdata import connect_hub
+from hubdata.result_cache import ResultCache
+
+NUM_THREADS = 16
+
+# NB: `hubdata.connect_hub` is the function, not the module
+connect_hub_module = importlib.import_module('hubdata.connect_hub')
+
+
+def _call_concurrently(fcn, num_threads=NUM_THREADS):
+    # start all threads at the same time to maximize contention
+    barrier = threading.Barrier(num_threads)
+
+    def call(_):
+        barrier.wait()
+        return fcn()
+
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        return list(executor.map(call, range(num_threads)))
+
+
+def test_lazy_initialization(monkeypatch):
+    num_calls = {'read_model_metadata': 0, 'create_round_index': 0}
+
+    def counting(fcn_name, fcn):
+        def wrapper(*args, **kwargs):
+            num_calls[fcn_name] += 1
+            time.sleep(0.05)  # widen the race window
+            return fcn(*args, **kwargs)
+
+        return wrapper
+
+    monkeypatch.setattr(connect_hub_module, 'read_model_metadata',
+                        counting('read_model_metadata', connect_hub_module.read_model_metadata))
+    monkeypatch.setattr(connect_hub_module, 'create_round_index',
+                        counting('create_round_index', connect_hub_module.create_round_index))
+    hub_connection = connect_hub(Path('test/hubs/flu-metrocast'))
+
+    model_metadatas = _call_concurrently(lambda: hub_connection.model_metadata)
+    assert all(model_metadata is model_metadatas[0] for model_metadata in model_metadatas)
+    round_indexes = _call_concurrently(lambda: hub_connection.round_index)
+    assert all(round_index is round_indexes[0] for round_index in round_indexes)
+    assert num_calls == {'read_model_metadata': 1, 'create_round_index': 1}
+
+
+def test_concurrent_queries():
+    hub_connection = connect_hub(Path('test/hubs/flu-metrocast'), result_cache=ResultCache())
+    location_names = ['Bronx', 'Brooklyn', 'Manhattan', 'Queens']
+    expected = {location_name: connect_hub(Path('test/hubs/flu-metrocast'))
+                .to_table(filter=pc.field('location') == location_name).num_rows for location_name in location_names}
+
+    def query(location_name):
+        model_filter = pc.field('designated_model') == True
+        return hub_connection.to_table(filter=pc.field('location') == location_name, model_filter=model_filter).num_rows
+
+    query_location_names = location_names * NUM_THREADS
+    with ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
+        results = list(executor.map(query, query_location_names))
+    assert results == [expected[location_name] for location_name in query_location_names]
+
+
+def test_read_only():
+    hub_connection = connect_hub(Path('test/hubs/simple'))
+    with pytest.raises(AttributeError, match='read-only'):
+        hub_connection.schema = None
+    with pytest.raises(AttributeError, match='read-only'):
+        hub_connection.new_attribute = 1
+
+
+def test_pickle():
+    hub_connection = connect_hub(Path('test/hubs/simple'), result_cache=ResultCache())
+    num_rows = hub_connection.to_table().num_rows
+    assert hub_connection.model_metadata.num_rows == 2  # load it so it's pickled
+
+    unpickled_connection = pickle.loads(pickle.dumps(hub_connection))
+    assert unpickled_connection.schema == hub_connection.schema
+    assert unpickled_connection.model_metadata.equals(hub_connection.model_metadata)
+    assert unpickled_connection.result_cache.nbytes == 0
+    assert unpickled_connection.to_table().num_rows == num_rows
+    with pytest.raises(AttributeError, match='read-only'):
+        unpickled_connection.schema = None
+
+
+def _count_rows(hub_connection, location_name):
+    return hub_connection.to_table(filter=pc.field('location') == location_name).num_rows
+
+
+def test_process_pool():
+    hub_connection = connect_hub(Path('test/hubs/flu-metrocast'))
+    location_names = ['Bronx', 'Brooklyn']
+    with ProcessPoolExecutor(max_workers=2, mp_context=get_context('spawn')) as executor:
+        results = list(executor.map(_count_rows, [hub_connection] * len(location_names), location_names))
+    assert results == [_count_rows(hub_connection, location_name) for location_name in location_names]